@@ -2,18 +2,19 @@
 Enhanced search functionality with multiple providers and self-improving capabilities.
 """
 import time
-import re
 import os
-from typing import List, Dict, Tuple, Union, Any
+import asyncio
+import threading
+import aiohttp
+from dataclasses import dataclass
+from typing import List, Dict, Tuple, Union, Any, Optional
 from colorama import Fore, Style
 import logging
-import sys
-from io import StringIO
-from web_scraper import get_web_content, can_fetch
+from web_scraper import WebScraper, get_web_content, can_fetch
 from llm_config import get_llm_config
 from llm_response_parser import UltimateLLMResponseParser
 from llm_wrapper import LLMWrapper
-from search_manager import SearchManager
+from search_manager import SearchManager, SearchResult, truncate
 from urllib.parse import urlparse
 from system_config import RESEARCH_CONFIG
 
@@ -34,27 +35,43 @@ logger.addHandler(file_handler)
 logger.propagate = False
 
 # Suppress other loggers
-for name in ['root', 'duckduckgo_search', 'requests', 'urllib3']:
+for name in ['root', 'duckduckgo_search', 'requests', 'urllib3', 'openai', 'anthropic', 'httpx', 'httpcore']:
     logging.getLogger(name).setLevel(logging.WARNING)
     logging.getLogger(name).handlers = []
     logging.getLogger(name).propagate = False
 
-class OutputRedirector:
-    def __init__(self, stream=None):
-        self.stream = stream or StringIO()
-        self.original_stdout = sys.stdout
-        self.original_stderr = sys.stderr
+@dataclass
+class ScrapedDoc:
+    """Scraped page content, with the whitespace-collapsed form computed once at fetch time"""
+    url: str
+    raw: str
+    normalized: str = ""
 
-    def __enter__(self):
-        sys.stdout = self.stream
-        sys.stderr = self.stream
-        return self.stream
-
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        sys.stdout = self.original_stdout
-        sys.stderr = self.original_stderr
+    def __post_init__(self):
+        if not self.normalized:
+            self.normalized = " ".join(self.raw.split())
 
 class EnhancedSelfImprovingSearch:
+    SELECT_RESULTS_SCHEMA = {
+        "type": "object",
+        "properties": {
+            "selected": {"type": "array", "items": {"type": "integer"}, "minItems": 2, "maxItems": 2},
+            "reasoning": {"type": "string"}
+        },
+        "required": ["selected", "reasoning"]
+    }
+    EVALUATION_SCHEMA = {
+        "type": "object",
+        "properties": {
+            "decision": {"type": "string", "enum": ["answer", "refine"]},
+            "reason": {"type": "string"},
+            "answer": {"type": "string"}
+        },
+        "required": ["decision", "reason", "answer"]
+    }
+    # Embedded answers shorter than this get a dedicated generate_final_answer call instead
+    MIN_EMBEDDED_ANSWER_LENGTH = 200
+
     def __init__(self, llm: LLMWrapper, parser: UltimateLLMResponseParser, max_attempts: int = 5):
         self.llm = llm
         self.parser = parser
@@ -65,14 +82,18 @@ class EnhancedSelfImprovingSearch:
         # Rate limiting configuration
         self.requests_per_minute = RESEARCH_CONFIG['rate_limiting']['requests_per_minute']
         self.concurrent_requests = RESEARCH_CONFIG['rate_limiting']['concurrent_requests']
-        self.cooldown_period = RESEARCH_CONFIG['rate_limiting']['cooldown_period']
         
-        self.last_request_time = 0
-        self.request_count = 0
+        # Token bucket: refills continuously at requests_per_minute and is shared by all callers
+        self._tokens = float(self.requests_per_minute)
+        self._last_refill = time.monotonic()
+        self._rate_lock = threading.Lock()
         
         self.last_query = None
         self.last_time_range = None
-        self.WHITESPACE_PATTERN = r'\s+'
+
+        # Shared by the async fetches and the threaded retries, so both honour the same
+        # per-domain rate limit; the retries send through its pooled session
+        self._scraper = WebScraper()
 
     @staticmethod
     def initialize_llm():
@@ -137,17 +158,20 @@ class EnhancedSelfImprovingSearch:
 
                 self.print_thinking()
 
-                with OutputRedirector() as output:
-                    evaluation, decision = self.evaluate_scraped_content(user_query, scraped_content)
-                llm_output = output.getvalue()
-                logger.info(f"LLM Output in evaluate_scraped_content:\n{llm_output}")
+                # If Tavily provided an AI answer, include it in the answer generation
+                ai_answer = search_results.get('answer', '') if search_results.get('provider') == 'tavily' else ''
+
+                evaluation, decision, answer = self.evaluate_scraped_content(user_query, scraped_content, ai_answer)
 
                 print(f"{Fore.MAGENTA}Evaluation: {evaluation}{Style.RESET_ALL}")
                 print(f"{Fore.MAGENTA}Decision: {decision}{Style.RESET_ALL}")
 
                 if decision == "answer":
-                    # If Tavily provided an AI answer, include it in the final answer generation
-                    ai_answer = search_results.get('answer', '') if search_results.get('provider') == 'tavily' else ''
+                    # The evaluation already drafted the answer; only spend a second call if it came back thin
+                    if len(answer) >= self.MIN_EMBEDDED_ANSWER_LENGTH:
+                        if logger.isEnabledFor(logging.INFO):
+                            logger.info("LLM Response:\n%s", answer)
+                        return answer
                     return self.generate_final_answer(user_query, scraped_content, ai_answer)
                 elif decision == "refine":
                     print(f"{Fore.YELLOW}Refining search...{Style.RESET_ALL}")
@@ -167,6 +191,22 @@ class EnhancedSelfImprovingSearch:
         """Placeholder for query formulation - returns original query and default time range."""
         return query, 'none'
 
+    def _acquire_search_token(self):
+        """Block until the token bucket allows another search request."""
+        rate_per_second = self.requests_per_minute / 60
+        while True:
+            with self._rate_lock:
+                now = time.monotonic()
+                elapsed = now - self._last_refill
+                self._tokens = min(self.requests_per_minute, self._tokens + elapsed * rate_per_second)
+                self._last_refill = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / rate_per_second
+            logger.warning(f"Rate limit reached. Waiting {wait:.1f} seconds for the next request slot")
+            time.sleep(wait)
+
     def perform_search(self, query: str, time_range: str) -> Dict[str, Any]:
         """
         Perform search using SearchManager with time range adaptation and rate limiting.
@@ -174,21 +214,8 @@ class EnhancedSelfImprovingSearch:
         if not query:
             return {'success': False, 'error': 'Empty query', 'results': [], 'provider': None}
         
-        # Rate limiting check
-        current_time = time.time()
-        time_since_last_request = current_time - self.last_request_time
-        
-        # Check if we need to cool down
-        if self.request_count >= self.requests_per_minute:
-            if time_since_last_request < self.cooldown_period:
-                logger.warning(f"Rate limit reached. Cooling down for {self.cooldown_period - time_since_last_request:.1f} seconds")
-                time.sleep(self.cooldown_period - time_since_last_request)
-                self.request_count = 0
-        
-        # Update rate limiting trackers
-        self.last_request_time = time.time()
-        self.request_count += 1
-        
+        self._acquire_search_token()
+
         search_params = {
             'max_results': RESEARCH_CONFIG['search']['max_results_per_search'],
             'min_relevance_score': RESEARCH_CONFIG['search']['min_relevance_score']
@@ -225,7 +252,10 @@ class EnhancedSelfImprovingSearch:
         except Exception as e:
             logger.error(f"Error displaying search results: {str(e)}")
 
-    def select_relevant_pages(self, search_results: List[Dict], user_query: str) -> List[str]:
+    def select_relevant_pages(self, search_results: Union[List[SearchResult], Dict[str, Any]], user_query: str) -> List[str]:
+        # Accept either the results list or the full search response dict
+        if isinstance(search_results, dict):
+            search_results = search_results.get('results', [])
         prompt = (
             f"Given the following search results for the user's question: \"{user_query}\"\n"
             "Select the 2 most relevant results to scrape and analyze. Explain your reasoning for each selection.\n\n"
@@ -234,64 +264,111 @@ class EnhancedSelfImprovingSearch:
             "1. You MUST select exactly 2 result numbers from the search results.\n"
             "2. Choose the results that are most likely to contain comprehensive and relevant information to answer the user's question.\n"
             "3. Provide a brief reason for each selection.\n\n"
-            "You MUST respond using EXACTLY this format and nothing else:\n\n"
-            "Selected Results: [Two numbers corresponding to the selected results]\n"
-            "Reasoning: [Your reasoning for the selections]"
+            "Respond with a JSON object of the form:\n"
+            '{"selected": [two result numbers], "reasoning": "your reasoning for the selections"}'
         )
 
-        max_retries = 3
-        for retry in range(max_retries):
-            with OutputRedirector() as output:
-                response_text = self.llm.generate(prompt, max_tokens=200, stop=None)
-            llm_output = output.getvalue()
-            logger.info(f"LLM Output in select_relevant_pages:\n{llm_output}")
-
-            parsed_response = {int(char) for char in response_text[:40] if char.isdigit()}
-            selected_urls = [search_results['results'][i-1]['url'] for i in parsed_response]
-
+        try:
+            # stop=None: the configured stops include "\n\n", which would cut pretty-printed JSON short
+            selection = self.llm.generate_json(prompt, self.SELECT_RESULTS_SCHEMA, "select_results", max_tokens=1024, stop=None)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("LLM Output in %s:\n%s", "select_relevant_pages", selection)
+
+            # Keep the model's order, drop out-of-range numbers and duplicates, take the first two
+            numbers = [n for n in map(self._result_number, selection.get('selected', [])) if n is not None and 1 <= n <= len(search_results)]
+            selected_urls = [search_results[i-1].url for i in list(dict.fromkeys(numbers))[:2]]
             allowed_urls = [url for url in selected_urls if can_fetch(url)]
             if allowed_urls:
                 return allowed_urls
-            else:
-                print(f"{Fore.YELLOW}Warning: All selected URLs are disallowed by robots.txt. Retrying selection.{Style.RESET_ALL}")
-
+            print(f"{Fore.YELLOW}Warning: No allowed URLs among the selected results.{Style.RESET_ALL}")
+        except Exception as e:
+            logger.warning(f"Structured page selection failed: {str(e)}")
 
-        print(f"{Fore.YELLOW}Warning: All attempts to select relevant pages failed. Falling back to top allowed results.{Style.RESET_ALL}")
-        allowed_urls = [result['url'] for result in search_results if can_fetch(result['url'])][:2]
+        print(f"{Fore.YELLOW}Warning: Page selection failed. Falling back to top allowed results.{Style.RESET_ALL}")
+        allowed_urls = [result.url for result in search_results if can_fetch(result.url)][:2]
         return allowed_urls
 
+    @staticmethod
+    def _result_number(value: Any) -> Optional[int]:
+        # Models sometimes quote numbers ("2"); a bool is an int subclass but never a result number
+        if isinstance(value, bool):
+            return None
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    def format_results(self, results: List[SearchResult]) -> str:
+        return "\n".join(
+            f"{i}. Title: {result.title}\n"
+            f"   Snippet: {truncate(result.content, 200)}...\n"
+            f"   URL: {result.url}\n"
+            + (f"   Published: {result.published_date}\n" if result.published_date else "")
+            + (f"   Relevance Score: {result.score}\n" if result.score else "")
+            for i, result in enumerate(results, 1)
+        )
 
-    def format_results(self, results: List[Dict]) -> str:
-        formatted_results = []
-        for i, result in enumerate(results['results'], 1):
-            formatted_result = f"{i}. Title: {result.get('title', 'N/A')}\n"
-            formatted_result += f"   Snippet: {result.get('content', 'N/A')[:200]}...\n"
-            formatted_result += f"   URL: {result.get('url', 'N/A')}\n"
-            if result.get('published_date'):
-                formatted_result += f"   Published: {result['published_date']}\n"
-            if result.get('score'):
-                formatted_result += f"   Relevance Score: {result['score']}\n"
-            formatted_results.append(formatted_result)
-        return "\n".join(formatted_results)
-
-    def scrape_content(self, urls: List[str]) -> Dict[str, str]:
+    def scrape_content(self, urls: List[str]) -> Dict[str, ScrapedDoc]:
+        # A fresh loop per batch, owned by the calling thread; research_manager calls this
+        # from its research worker thread, not the thread that built this object
+        return asyncio.run(self.scrape_content_async(urls))
+
+    async def _fetch_one(self, session: aiohttp.ClientSession, url: str) -> Tuple[str, str]:
+        delay = self._scraper.reserve_request_slot(url)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        async with session.get(url) as response:
+            response.raise_for_status()
+            return url, await response.text()
+
+    async def scrape_content_async(self, urls: List[str]) -> Dict[str, ScrapedDoc]:
+        """Fetch all allowed URLs concurrently and extract their main text content."""
         scraped_content = {}
-        blocked_urls = []
-        for url in urls:
-            robots_allowed = can_fetch(url)
-            if robots_allowed:
-                content = get_web_content([url])
-                if content:
-                    scraped_content.update(content)
+        # robots.txt lookups and HTML parsing are blocking, so they run in worker threads
+        allowed = await asyncio.gather(*(asyncio.to_thread(can_fetch, url) for url in urls))
+        allowed_urls = [url for url, ok in zip(urls, allowed) if ok]
+        blocked_urls = [url for url, ok in zip(urls, allowed) if not ok]
+        for url in blocked_urls:
+            print(Fore.RED + f"Warning: Robots.txt disallows scraping of {url}" + Style.RESET_ALL)
+            logger.warning(f"Robots.txt disallows scraping of {url}")
+
+        async with aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=30),
+            headers={"User-Agent": self._scraper.session.headers["User-Agent"]}
+        ) as session:
+            responses = await asyncio.gather(*(self._fetch_one(session, url) for url in allowed_urls), return_exceptions=True)
+
+        failed_urls = []
+        fetched = []
+        for url, response in zip(allowed_urls, responses):
+            if isinstance(response, Exception):
+                logger.warning(f"Async fetch failed for {url}: {response}")
+                failed_urls.append(url)
+            else:
+                fetched.append(response)
+
+        extracted = await asyncio.gather(*(asyncio.to_thread(self._scraper.extract_content, html, url) for url, html in fetched))
+        for (url, _), page in zip(fetched, extracted):
+            content = page['content']
+            if content:
+                scraped_content[url] = ScrapedDoc(url, content)
+                print(Fore.YELLOW + f"Successfully scraped: {url}" + Style.RESET_ALL)
+                logger.info(f"Successfully scraped: {url}")
+            else:
+                print(Fore.RED + f"No content extracted from {url}" + Style.RESET_ALL)
+                logger.warning(f"No content extracted from {url}")
+
+        if failed_urls:
+            # Retry failures in one batch through the threaded scraper, which has per-request retries and backoff
+            retried = await asyncio.to_thread(get_web_content, failed_urls, self._scraper) or {}
+            for url in failed_urls:
+                if retried.get(url):
+                    scraped_content[url] = ScrapedDoc(url, retried[url])
                     print(Fore.YELLOW + f"Successfully scraped: {url}" + Style.RESET_ALL)
                     logger.info(f"Successfully scraped: {url}")
                 else:
-                    print(Fore.RED + f"Robots.txt disallows scraping of {url}" + Style.RESET_ALL)
-                    logger.warning(f"Robots.txt disallows scraping of {url}")
-            else:
-                blocked_urls.append(url)
-                print(Fore.RED + f"Warning: Robots.txt disallows scraping of {url}" + Style.RESET_ALL)
-                logger.warning(f"Robots.txt disallows scraping of {url}")
+                    print(Fore.RED + f"Failed to scrape: {url}" + Style.RESET_ALL)
+                    logger.warning(f"Failed to scrape: {url}")
 
         print(Fore.CYAN + f"Scraped content received for {len(scraped_content)} URLs" + Style.RESET_ALL)
         logger.info(f"Scraped content received for {len(scraped_content)} URLs")
@@ -302,13 +379,51 @@ class EnhancedSelfImprovingSearch:
 
         return scraped_content
 
-    def display_scraped_content(self, scraped_content: Dict[str, str]):
+    def close(self):
+        """Release pooled scraper connections. Safe to call more than once; later scrapes reconnect."""
+        self._scraper.session.close()
+
+    def display_scraped_content(self, scraped_content: Dict[str, ScrapedDoc]):
         print(f"\n{Fore.CYAN}Scraped Content:{Style.RESET_ALL}")
-        for url, content in scraped_content.items():
+        for url, doc in scraped_content.items():
             print(f"{Fore.GREEN}URL: {url}{Style.RESET_ALL}")
-            print(f"Content: {content[:4000]}...\n")
+            print(f"Content: {truncate(doc.raw, 4000)}...\n")
+
+    def evaluate_scraped_content(self, user_query: str, scraped_content: Dict[str, ScrapedDoc], ai_answer: str = '') -> Tuple[str, str, str]:
+        """
+        Decide whether the scraped content answers the question and, if so, write the answer in the same call.
+
+        Returns:
+            Tuple of (evaluation reason, decision of "answer" or "refine", answer text or '')
+        """
+        ai_summary = f"AI-Generated Summary:\n{ai_answer}\n\n" if ai_answer else ""
+        prompt = (
+            f"You are an AI assistant. Evaluate whether the scraped content below is sufficient to answer "
+            f"the following question, and if it is, answer it.\n\n"
+            f"Question: \"{user_query[:200]}\"\n\n"
+            f"{ai_summary}"
+            f"Scraped Content:\n{self.format_scraped_content(scraped_content)}\n\n"
+            f"Instructions:\n"
+            f"1. Set \"decision\" to \"answer\" if the content is sufficient, or \"refine\" if another search is needed.\n"
+            f"2. Give a brief \"reason\" for the decision.\n"
+            f"3. If the decision is \"answer\", put a comprehensive and detailed answer in \"answer\". Answer directly "
+            f"and thoroughly, without references or mentions of sources. If an AI-generated summary is provided, use it "
+            f"to enhance your answer but don't rely on it exclusively. If the decision is \"refine\", leave \"answer\" empty.\n\n"
+            f"Respond with a JSON object of the form:\n"
+            f'{{"decision": "answer" or "refine", "reason": "...", "answer": "..."}}'
+        )
+        try:
+            result = self.llm.generate_json(prompt, self.EVALUATION_SCHEMA, "evaluate_content", max_tokens=4096, stop=None)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("LLM Output in %s:\n%s", "evaluate_scraped_content", result)
+        except Exception as e:
+            # Without an evaluation, fall through to a dedicated answer call
+            logger.warning(f"Content evaluation failed: {str(e)}")
+            return "Evaluation unavailable", "answer", ""
+        decision = str(result.get('decision', '')).strip().lower()
+        return str(result.get('reason', '')), decision, str(result.get('answer') or '').strip()
 
-    def generate_final_answer(self, user_query: str, scraped_content: Dict[str, str], ai_answer: str = '') -> str:
+    def generate_final_answer(self, user_query: str, scraped_content: Dict[str, ScrapedDoc], ai_answer: str = '') -> str:
         user_query_short = user_query[:200]
         ai_summary = f"AI-Generated Summary:\n{ai_answer}\n\n" if ai_answer else ""
         
@@ -330,24 +445,18 @@ class EnhancedSelfImprovingSearch:
 
         max_retries = 3
         for attempt in range(max_retries):
-            with OutputRedirector() as output:
-                response_text = self.llm.generate(prompt, max_tokens=4096, stop=None)
-            llm_output = output.getvalue()
-            logger.info(f"LLM Output in generate_final_answer:\n{llm_output}")
+            response_text = self.llm.generate(prompt, max_tokens=4096, stop=None, semantic_cache=True)
             if response_text:
-                logger.info(f"LLM Response:\n{response_text}")
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("LLM Response:\n%s", response_text)
                 return response_text
 
         error_message = "I apologize, but I couldn't generate a satisfactory answer based on the available information."
         logger.warning(f"Failed to generate a response after {max_retries} attempts. Returning error message.")
         return error_message
 
-    def format_scraped_content(self, scraped_content: Dict[str, str]) -> str:
-        formatted_content = []
-        for url, content in scraped_content.items():
-            content = re.sub(self.WHITESPACE_PATTERN, ' ', content)
-            formatted_content.append(f"Content from {url}:{content}")
-        return "\n".join(formatted_content)
+    def format_scraped_content(self, scraped_content: Dict[str, ScrapedDoc]) -> str:
+        return "\n".join(f"Content from {doc.url}:{doc.normalized}" for doc in scraped_content.values())
 
     def synthesize_final_answer(self, user_query: str) -> str:
         prompt = (
@@ -358,10 +467,9 @@ class EnhancedSelfImprovingSearch:
             f"Respond in a clear, concise, and informative manner."
         )
         try:
-            with OutputRedirector() as output:
-                response_text = self.llm.generate(prompt, max_tokens=self.llm_config.get('max_tokens', 1024), stop=self.llm_config.get('stop', None))
-            llm_output = output.getvalue()
-            logger.info(f"LLM Output in synthesize_final_answer:\n{llm_output}")
+            response_text = self.llm.generate(prompt, max_tokens=self.llm_config.get('max_tokens', 1024), stop=self.llm_config.get('stop', None), semantic_cache=True)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("LLM Output in %s:\n%s", "synthesize_final_answer", response_text)
             if response_text:
                 return response_text.strip()
         except Exception as e:
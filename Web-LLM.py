@@ -290,6 +290,8 @@ def main():
     finally:
         # Ensure proper cleanup on exit
         try:
+            if 'search_engine' in locals() and search_engine:
+                search_engine.close()
             if 'research_manager' in locals() and research_manager:
                 if hasattr(research_manager, 'ui'):
                     research_manager.ui.cleanup()
@@ -0,0 +1,251 @@
+"""
+Response caching for LLMWrapper so repeated prompts skip the provider round trip.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class LLMCache:
+    """
+    Exact-match response cache keyed by a hash of the prompt and generation settings.
+    Entries are kept in memory and persisted to a JSON file between runs.
+    """
+
+    def __init__(self, path: str = "data/llm_cache.json", ttl: int = 3600, max_entries: int = 1000,
+                 save_every: int = 10, log_every: int = 50):
+        """
+        Initialize the cache and load any entries persisted by a previous run.
+
+        Args:
+            path: JSON file used to persist cached responses
+            ttl: Seconds a cached response stays valid
+            max_entries: Oldest entries are evicted beyond this many
+            save_every: Persist to disk after this many new entries (and at exit)
+            log_every: Log hit/miss statistics after this many lookups
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.save_every = save_every
+        self.log_every = log_every
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self._entries: Dict[str, Dict[str, Any]] = self._load()
+        atexit.register(self.flush)
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Load persisted entries, dropping any that have already expired."""
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load LLM cache from {self.path}: {e}")
+            return {}
+        now = time.time()
+        # Entries are saved oldest first, so the newest max_entries are at the end
+        fresh = [(key, entry) for key, entry in entries.items() if now - entry.get('ts', 0) < self.ttl]
+        return dict(fresh[-self.max_entries:])
+
+    def _save(self):
+        """Write entries to disk via a temp file so a crash never leaves a half-written cache."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.path)
+            self._unsaved = 0
+        except OSError as e:
+            logger.warning(f"Could not save LLM cache to {self.path}: {e}")
+
+    def flush(self):
+        """Persist entries added since the last save."""
+        with self._lock:
+            if self._unsaved:
+                self._save()
+
+    def _evict(self, now: float):
+        """Drop expired entries, then the oldest ones beyond max_entries."""
+        entries = self._entries
+        # Insertion order is storage order, so the oldest entry is always first
+        while entries:
+            oldest_key = next(iter(entries))
+            if len(entries) <= self.max_entries and now - entries[oldest_key]['ts'] < self.ttl:
+                break
+            del entries[oldest_key]
+
+    def _record(self, hit: bool):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        total = self.hits + self.misses
+        if self.log_every and total % self.log_every == 0:
+            logger.info(f"LLM cache stats: {self.hits} hits, {self.misses} misses ({self.hits / total:.0%} hit rate)")
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry['ts'] >= self.ttl:
+                del self._entries[key]
+                entry = None
+            self._record(entry is not None)
+            return entry['response'] if entry is not None else None
+
+    def set(self, key: str, response: str):
+        """Store a response, persisting the cache every save_every stores."""
+        with self._lock:
+            now = time.time()
+            # Re-insert so a refreshed key moves to the newest end
+            self._entries.pop(key, None)
+            self._entries[key] = {'response': response, 'ts': now}
+            self._evict(now)
+            # Rewriting the file is O(cache size), so batch it rather than paying it per store
+            self._unsaved += 1
+            if self._unsaved >= self.save_every:
+                self._save()
+
+class SemanticLLMCache:
+    """
+    Similarity cache that returns a stored response when a new prompt's embedding
+    is close enough to one seen before under the same generation settings.
+    Vectors are persisted as a .npy file with the responses in a JSON sidecar.
+    """
+
+    def __init__(self, embed: Callable[[str], List[float]], path: str = "data/llm_semantic_cache",
+                 threshold: float = 0.92, ttl: int = 86400, max_entries: int = 1000, save_every: int = 10):
+        """
+        Initialize the cache and load any entries persisted by a previous run.
+
+        Args:
+            embed: Function returning the embedding vector for a prompt
+            path: File prefix; vectors go to <path>.npy and responses to <path>.json
+            threshold: Minimum cosine similarity for a cached response to be reused
+            ttl: Seconds a cached response stays valid
+            max_entries: Oldest entries are evicted beyond this many
+            save_every: Persist to disk after this many new entries (and at exit)
+        """
+        self.embed = embed
+        self.path = path
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.save_every = save_every
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self._vectors, self._entries = self._load()
+        self._evict(time.time())
+        self._reindex()
+        atexit.register(self.flush)
+
+    def _empty(self):
+        return np.empty((0, 0), dtype=np.float32), []
+
+    def _load(self):
+        vectors_path, responses_path = f"{self.path}.npy", f"{self.path}.json"
+        if not (os.path.exists(vectors_path) and os.path.exists(responses_path)):
+            return self._empty()
+        try:
+            vectors = np.load(vectors_path).astype(np.float32)
+            with open(responses_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load semantic LLM cache from {self.path}: {e}")
+            return self._empty()
+        if len(vectors) != len(entries) or not all(isinstance(entry, dict) for entry in entries):
+            logger.warning(f"Semantic LLM cache at {self.path} is inconsistent, starting empty")
+            return self._empty()
+        return vectors, entries
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        try:
+            np.save(f"{self.path}.npy", self._vectors)
+            with open(f"{self.path}.json", 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f)
+            self._unsaved = 0
+        except OSError as e:
+            logger.warning(f"Could not save semantic LLM cache to {self.path}: {e}")
+
+    def flush(self):
+        """Persist entries added since the last save."""
+        with self._lock:
+            if self._unsaved:
+                self._save()
+
+    def _evict(self, now: float):
+        """Drop expired entries, then the oldest ones beyond max_entries."""
+        keep = [i for i, entry in enumerate(self._entries) if now - entry['ts'] < self.ttl][-self.max_entries:]
+        if len(keep) != len(self._entries):
+            self._vectors = self._vectors[keep] if keep else self._empty()[0]
+            self._entries = [self._entries[i] for i in keep]
+            self._unsaved += 1
+
+    def _reindex(self):
+        """Rebuild the per-row arrays used to score and filter a lookup."""
+        self._norms = np.linalg.norm(self._vectors, axis=1) if self._entries else np.empty(0, dtype=np.float32)
+        self._params = np.array([entry['params'] for entry in self._entries], dtype=object)
+        self._stored_at = np.array([entry['ts'] for entry in self._entries], dtype=np.float64)
+
+    def lookup(self, prompt: str, params: str):
+        """
+        Embed the prompt and search the cache for a near-duplicate.
+
+        Args:
+            prompt: The prompt about to be sent
+            params: Key of the generation settings; only entries stored under the same key match
+
+        Returns:
+            Tuple of (cached response or None, prompt embedding) so callers can pass
+            the embedding back to store() without embedding the prompt twice
+        """
+        vector = np.asarray(self.embed(prompt), dtype=np.float32)
+        with self._lock:
+            if self._entries and self._vectors.shape[1] == vector.shape[0]:
+                # One matrix-vector product scores every cached prompt at once
+                scores = self._vectors @ vector / (self._norms * np.linalg.norm(vector) + 1e-12)
+                usable = (self._params == params) & (time.time() - self._stored_at < self.ttl)
+                scores = np.where(usable, scores, -np.inf)
+                best = int(scores.argmax())
+                if scores[best] >= self.threshold:
+                    self.hits += 1
+                    return self._entries[best]['response'], vector
+            self.misses += 1
+        return None, vector
+
+    def store(self, vector: np.ndarray, response: str, params: str):
+        """Add a prompt embedding and its response; empty responses are not kept."""
+        if not (response and response.strip()):
+            return
+        with self._lock:
+            if self._entries and self._vectors.shape[1] != vector.shape[0]:
+                # Embedding model changed; vectors from the old one are not comparable
+                self._vectors, self._entries = self._empty()
+            now = time.time()
+            row = vector.reshape(1, -1)
+            self._vectors = np.vstack([self._vectors, row]) if self._entries else row
+            self._entries.append({'response': response, 'params': params, 'ts': now})
+            self._evict(now)
+            self._reindex()
+            # Rewriting both files is O(cache size), so batch it rather than paying it per store
+            self._unsaved += 1
+            if self._unsaved >= self.save_every:
+                self._save()
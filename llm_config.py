@@ -1,4 +1,6 @@
 # llm_config.py
+from functools import lru_cache
+from types import MappingProxyType
 
 LLM_TYPE = "ollama"  # Options: 'ollama', 'openai', 'anthropic' (careful API calls will cost a lot if your actually using ChatGPT)
 
@@ -57,14 +59,37 @@ LLM_CONFIG_ANTHROPIC = {
     "stop": ["User:", "\n\n"]
 }
 
+# Response cache settings shared by every LLM type
+LLM_CACHE_CONFIG = {
+    "path": "data/llm_cache.json",  # where cached responses are persisted between runs
+    "ttl": 3600,  # seconds a cached response stays valid
+    "max_entries": 1000,  # oldest entries are evicted beyond this many
+    "max_temperature": 0.1,  # calls sampled above this temperature bypass the cache; the configs above
+                             # default to 0.7, so only calls passing a low temperature explicitly are cached
+    "semantic": {
+        "enabled": False,  # reuse responses for near-duplicate prompts (costs one embedding call per lookup)
+        "path": "data/llm_semantic_cache",  # vectors saved as .npy with a .json sidecar
+        "threshold": 0.92,  # minimum cosine similarity to count as a hit
+        "ttl": 86400,  # seconds a cached response stays valid
+        "max_entries": 1000,  # oldest entries are evicted beyond this many
+        "embedding_model": "text-embedding-3-small"  # OpenAI model; for Ollama use a pulled embedding model e.g. "nomic-embed-text"
+    }
+}
+
+@lru_cache(maxsize=1)
 def get_llm_config():
+    # The config is fixed for the process, so every caller shares one read-only view of it.
+    # Use dict(get_llm_config()) if you need a copy you can modify.
     if LLM_TYPE == "llama_cpp":
-        return LLM_CONFIG_LLAMA_CPP
+        return MappingProxyType(LLM_CONFIG_LLAMA_CPP)
     elif LLM_TYPE == "ollama":
-        return LLM_CONFIG_OLLAMA
+        return MappingProxyType(LLM_CONFIG_OLLAMA)
     elif LLM_TYPE == "openai":
-        return LLM_CONFIG_OPENAI
+        return MappingProxyType(LLM_CONFIG_OPENAI)
     elif LLM_TYPE == "anthropic":
-        return LLM_CONFIG_ANTHROPIC
+        return MappingProxyType(LLM_CONFIG_ANTHROPIC)
     else:
         raise ValueError(f"Invalid LLM_TYPE: {LLM_TYPE}")
+
+def get_llm_cache_config():
+    return LLM_CACHE_CONFIG
@@ -1,21 +1,36 @@
 import os
+import asyncio
 from llama_cpp import Llama
 import requests
-import json
-from llm_config import get_llm_config
-from openai import OpenAI
+from requests.adapters import HTTPAdapter
+import hashlib
+import threading
+import orjson
+from llm_config import get_llm_config, get_llm_cache_config
+from llm_cache import LLMCache, SemanticLLMCache
+from openai import OpenAI, AsyncOpenAI
 from anthropic import Anthropic
 
 class LLMWrapper:
     def __init__(self):
         self.llm_config = get_llm_config()
         self.llm_type = self.llm_config.get('llm_type', 'llama_cpp')
+        # Resolve per-request defaults once instead of re-reading the config on every call
+        self._defaults = {
+            'temperature': self.llm_config.get('temperature', 0.7),
+            'top_p': self.llm_config.get('top_p', 0.9),
+            'max_tokens': self.llm_config.get('max_tokens', 55000 if self.llm_type in ('llama_cpp', 'ollama') else 4096),
+            'stop': self.llm_config.get('stop', []),
+            'presence_penalty': self.llm_config.get('presence_penalty', 0),
+            'frequency_penalty': self.llm_config.get('frequency_penalty', 0)
+        }
         
         if self.llm_type == 'llama_cpp':
             self.llm = self._initialize_llama_cpp()
         elif self.llm_type == 'ollama':
             self.base_url = self.llm_config.get('base_url', 'http://localhost:11434')
             self.model_name = self.llm_config.get('model_name', 'your_model_name')
+            self._http = self._initialize_http_session()
         elif self.llm_type == 'openai':
             self._initialize_openai()
         elif self.llm_type == 'anthropic':
@@ -23,6 +38,47 @@ class LLMWrapper:
         else:
             raise ValueError(f"Unsupported LLM type: {self.llm_type}")
 
+        cache_config = get_llm_cache_config()
+        self._cache_config = cache_config
+        # Built on the first cacheable call; at the default temperature none are, so the file is never loaded
+        self._cache = None
+        self._cache_init_lock = threading.Lock()
+        self.cache_max_temperature = cache_config['max_temperature']
+        self.semantic_cache = self._initialize_semantic_cache(cache_config.get('semantic', {}))
+
+    def _initialize_semantic_cache(self, semantic_config):
+        if not semantic_config.get('enabled'):
+            return None
+        if self.llm_type not in ('openai', 'ollama'):
+            # Anthropic and llama_cpp have no embedding endpoint wired up here
+            return None
+        self.embedding_model = semantic_config.get('embedding_model', 'text-embedding-3-small')
+        return SemanticLLMCache(
+            embed=self._embed,
+            path=semantic_config.get('path', 'data/llm_semantic_cache'),
+            threshold=semantic_config.get('threshold', 0.92),
+            ttl=semantic_config.get('ttl', 86400),
+            max_entries=semantic_config.get('max_entries', 1000)
+        )
+
+    def _embed(self, text):
+        if self.llm_type == 'openai':
+            response = self.client.embeddings.create(model=self.embedding_model, input=text)
+            return response.data[0].embedding
+        response = self._http.post(f"{self.base_url}/api/embeddings", json={'model': self.embedding_model, 'prompt': text})
+        if response.status_code != 200:
+            raise Exception(f"Ollama embeddings request failed with status {response.status_code}: {response.text}")
+        return response.json()['embedding']
+
+    def _initialize_http_session(self):
+        # One pooled keep-alive session so every Ollama call reuses the same socket
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers['Connection'] = 'keep-alive'
+        return session
+
     def _initialize_llama_cpp(self):
         return Llama(
             model_path=self.llm_config.get('model_path'),
@@ -48,6 +104,10 @@ class LLMWrapper:
             client_kwargs['base_url'] = base_url
             
         self.client = OpenAI(**client_kwargs)
+        # The async client is created per event loop; see _openai_async_client
+        self._openai_client_kwargs = client_kwargs
+        self._aclient = None
+        self._aclient_loop = None
         self.model_name = model_name
 
     def _initialize_anthropic(self):
@@ -62,7 +122,133 @@ class LLMWrapper:
         self.client = Anthropic(api_key=api_key)
         self.model_name = model_name
 
-    def generate(self, prompt, **kwargs):
+    def _generation_params(self, **kwargs):
+        params = {**self._defaults, **kwargs}
+        return {
+            'model': self.llm_config.get('model_name') or self.llm_config.get('model_path'),
+            'temperature': params['temperature'],
+            'top_p': params['top_p'],
+            'max_tokens': params['max_tokens'],
+            'stop': params['stop']
+        }
+
+    def _cache_key(self, prompt, **kwargs):
+        payload = {**self._generation_params(**kwargs), 'prompt': prompt}
+        return hashlib.sha256(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+    def _params_key(self, **kwargs):
+        # Semantic matches are only reused between calls with identical generation settings
+        return hashlib.sha256(orjson.dumps(self._generation_params(**kwargs), option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+    def generate(self, prompt, semantic_cache=False, **kwargs):
+        """
+        Generate a response, reusing cached responses where possible.
+
+        The exact-match cache only serves calls sampled at or below the cache's
+        max_temperature (see LLM_CACHE_CONFIG). The configured defaults sample at
+        0.7, so the cache stays out of the way (and is never loaded) unless a
+        call passes a low temperature explicitly.
+
+        Pass semantic_cache=True for prompts that are regenerated almost verbatim
+        across retries; near-duplicates are then matched by embedding similarity
+        when the semantic cache is enabled in llm_config.py.
+        """
+        if semantic_cache and self.semantic_cache is not None:
+            return self._semantic_generate(prompt, **kwargs)
+
+        if not self._is_cacheable(**kwargs):
+            return self._generate(prompt, **kwargs)
+
+        key = self._cache_key(prompt, **kwargs)
+        cached = self._get_cache().get(key)
+        if cached is not None:
+            return cached
+        response = self._generate(prompt, **kwargs)
+        self._cache_response(key, response)
+        return response
+
+    async def generate_async(self, prompt, semantic_cache=False, **kwargs):
+        """
+        Awaitable counterpart of generate() so independent prompts can run concurrently.
+        OpenAI uses its native async client; other backends run generate() in a worker thread.
+        """
+        if self.llm_type != 'openai' or (semantic_cache and self.semantic_cache is not None):
+            return await asyncio.to_thread(self.generate, prompt, semantic_cache=semantic_cache, **kwargs)
+
+        if not self._is_cacheable(**kwargs):
+            return await self._openai_generate_async(prompt, **kwargs)
+
+        key = self._cache_key(prompt, **kwargs)
+        cached = self._get_cache().get(key)
+        if cached is not None:
+            return cached
+        response = await self._openai_generate_async(prompt, **kwargs)
+        self._cache_response(key, response)
+        return response
+
+    async def generate_many(self, prompts, return_exceptions=False, **kwargs):
+        """
+        Generate responses for several prompts concurrently, preserving input order.
+
+        Args:
+            prompts: The prompts to generate responses for
+            return_exceptions: Return a failed prompt's exception in its place instead of raising
+            **kwargs: Generation settings applied to every prompt
+
+        Returns:
+            List of responses (or exceptions), one per prompt
+        """
+        if self.llm_type == 'llama_cpp':
+            # A local model runs one completion at a time, so its prompts take turns
+            results = []
+            for prompt in prompts:
+                try:
+                    results.append(await asyncio.to_thread(self.generate, prompt, **kwargs))
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    results.append(e)
+            return results
+        return await asyncio.gather(
+            *(self.generate_async(prompt, **kwargs) for prompt in prompts),
+            return_exceptions=return_exceptions
+        )
+
+    def _get_cache(self):
+        if self._cache is None:
+            with self._cache_init_lock:
+                if self._cache is None:
+                    self._cache = LLMCache(
+                        path=self._cache_config['path'],
+                        ttl=self._cache_config['ttl'],
+                        max_entries=self._cache_config.get('max_entries', 1000)
+                    )
+        return self._cache
+
+    def _cache_response(self, key, response):
+        # An empty completion is a failure to retry, not an answer to replay
+        if response and response.strip():
+            self._get_cache().set(key, response)
+
+    def _is_cacheable(self, **kwargs):
+        # Only near-deterministic calls are cached so sampled generations keep their diversity
+        temperature = kwargs.get('temperature', self._defaults['temperature'])
+        return temperature <= self.cache_max_temperature
+
+    def _semantic_generate(self, prompt, **kwargs):
+        params_key = self._params_key(**kwargs)
+        try:
+            cached, vector = self.semantic_cache.lookup(prompt, params_key)
+        except Exception:
+            # An embedding failure should never block generation itself
+            return self._generate(prompt, **kwargs)
+        if cached is not None:
+            return cached
+        response = self._generate(prompt, **kwargs)
+        self.semantic_cache.store(vector, response, params_key)
+        return response
+
+    def _generate(self, prompt, **kwargs):
         if self.llm_type == 'llama_cpp':
             llama_kwargs = self._prepare_llama_kwargs(kwargs)
             response = self.llm(prompt, **llama_kwargs)
@@ -76,48 +262,139 @@ class LLMWrapper:
         else:
             raise ValueError(f"Unsupported LLM type: {self.llm_type}")
 
+    def generate_json(self, prompt, schema, name, **kwargs):
+        """
+        Generate a response constrained to a JSON object matching schema.
+
+        OpenAI and Anthropic are forced to call a single tool named name whose
+        parameters are schema; Ollama uses its JSON output format. llama_cpp has no
+        constrained mode here, so its raw text is parsed as JSON.
+
+        Returns:
+            The decoded JSON object as a dict
+
+        Raises:
+            ValueError: If the model output is not a JSON object
+        """
+        if self.llm_type == 'openai':
+            return self._openai_generate_json(prompt, schema, name, **kwargs)
+        elif self.llm_type == 'anthropic':
+            return self._anthropic_generate_json(prompt, schema, name, **kwargs)
+        elif self.llm_type == 'ollama':
+            text = self._ollama_generate(prompt, format='json', **kwargs)
+        else:
+            text = self._generate(prompt, **kwargs)
+        return self._parse_json_object(text)
+
+    def _parse_json_object(self, text):
+        try:
+            result = orjson.loads(text)
+        except orjson.JSONDecodeError as e:
+            raise ValueError(f"LLM did not return valid JSON: {e}")
+        if not isinstance(result, dict):
+            raise ValueError("LLM did not return a JSON object")
+        return result
+
     def _ollama_generate(self, prompt, **kwargs):
+        params = {**self._defaults, **kwargs}
         url = f"{self.base_url}/api/generate"
         data = {
             'model': self.model_name,
             'prompt': prompt,
             'options': {
-                'temperature': kwargs.get('temperature', self.llm_config.get('temperature', 0.7)),
-                'top_p': kwargs.get('top_p', self.llm_config.get('top_p', 0.9)),
-                'stop': kwargs.get('stop', self.llm_config.get('stop', [])),
-                'num_predict': kwargs.get('max_tokens', self.llm_config.get('max_tokens', 55000)),
+                'temperature': params['temperature'],
+                'top_p': params['top_p'],
+                'stop': params['stop'],
+                'num_predict': params['max_tokens'],
                 'num_ctx': self.llm_config.get('n_ctx', 55000)
             }
         }
-        response = requests.post(url, json=data, stream=True)
-        if response.status_code != 200:
-            raise Exception(f"Ollama API request failed with status {response.status_code}: {response.text}")
-        text = ''.join(json.loads(line)['response'] for line in response.iter_lines() if line)
-        return text.strip()
+        if kwargs.get('format'):
+            data['format'] = kwargs['format']
+        # Closing the response on exit hands the connection back to the pool,
+        # even when we stop reading before EOF or bail out on an error status
+        with self._http.post(url, json=data, stream=True) as response:
+            if response.status_code != 200:
+                raise Exception(f"Ollama API request failed with status {response.status_code}: {response.text}")
+            chunks = []
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = orjson.loads(line)
+                chunks.append(chunk.get('response', ''))
+                # The final chunk carries only timing metadata; stop reading once it arrives
+                if chunk.get('done'):
+                    break
+        return ''.join(chunks).strip()
 
     def _openai_generate(self, prompt, **kwargs):
+        params = {**self._defaults, **kwargs}
         try:
             response = self.client.chat.completions.create(
                 model=self.model_name,
                 messages=[{"role": "user", "content": prompt}],
-                temperature=kwargs.get('temperature', self.llm_config.get('temperature', 0.7)),
-                top_p=kwargs.get('top_p', self.llm_config.get('top_p', 0.9)),
-                max_tokens=kwargs.get('max_tokens', self.llm_config.get('max_tokens', 4096)),
-                stop=kwargs.get('stop', self.llm_config.get('stop', [])),
-                presence_penalty=self.llm_config.get('presence_penalty', 0),
-                frequency_penalty=self.llm_config.get('frequency_penalty', 0)
+                temperature=params['temperature'],
+                top_p=params['top_p'],
+                max_tokens=params['max_tokens'],
+                stop=params['stop'],
+                presence_penalty=params['presence_penalty'],
+                frequency_penalty=params['frequency_penalty']
             )
             return response.choices[0].message.content.strip()
         except Exception as e:
             raise Exception(f"OpenAI API request failed: {str(e)}")
 
+    def _openai_async_client(self):
+        # httpx connection pools belong to the event loop that opened them, and every
+        # asyncio.run() starts a new loop, so a client is only reused within one loop
+        loop = asyncio.get_running_loop()
+        if self._aclient is None or self._aclient_loop is not loop:
+            self._aclient = AsyncOpenAI(**self._openai_client_kwargs)
+            self._aclient_loop = loop
+        return self._aclient
+
+    async def _openai_generate_async(self, prompt, **kwargs):
+        params = {**self._defaults, **kwargs}
+        try:
+            response = await self._openai_async_client().chat.completions.create(
+                model=self.model_name,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=params['temperature'],
+                top_p=params['top_p'],
+                max_tokens=params['max_tokens'],
+                stop=params['stop'],
+                presence_penalty=params['presence_penalty'],
+                frequency_penalty=params['frequency_penalty']
+            )
+            return response.choices[0].message.content.strip()
+        except Exception as e:
+            raise Exception(f"OpenAI API request failed: {str(e)}")
+
+    def _openai_generate_json(self, prompt, schema, name, **kwargs):
+        params = {**self._defaults, **kwargs}
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model_name,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=params['temperature'],
+                top_p=params['top_p'],
+                max_tokens=params['max_tokens'],
+                tools=[{"type": "function", "function": {"name": name, "parameters": schema}}],
+                tool_choice={"type": "function", "function": {"name": name}}
+            )
+            arguments = response.choices[0].message.tool_calls[0].function.arguments
+        except Exception as e:
+            raise Exception(f"OpenAI API request failed: {str(e)}")
+        return self._parse_json_object(arguments)
+
     def _anthropic_generate(self, prompt, **kwargs):
+        params = {**self._defaults, **kwargs}
         try:
             response = self.client.messages.create(
                 model=self.model_name,
-                max_tokens=kwargs.get('max_tokens', self.llm_config.get('max_tokens', 4096)),
-                temperature=kwargs.get('temperature', self.llm_config.get('temperature', 0.7)),
-                top_p=kwargs.get('top_p', self.llm_config.get('top_p', 0.9)),
+                max_tokens=params['max_tokens'],
+                temperature=params['temperature'],
+                top_p=params['top_p'],
                 messages=[{
                     "role": "user",
                     "content": prompt
@@ -127,12 +404,30 @@ class LLMWrapper:
         except Exception as e:
             raise Exception(f"Anthropic API request failed: {str(e)}")
 
+    def _anthropic_generate_json(self, prompt, schema, name, **kwargs):
+        params = {**self._defaults, **kwargs}
+        try:
+            response = self.client.messages.create(
+                model=self.model_name,
+                max_tokens=params['max_tokens'],
+                temperature=params['temperature'],
+                messages=[{
+                    "role": "user",
+                    "content": prompt
+                }],
+                tools=[{"name": name, "input_schema": schema}],
+                tool_choice={"type": "tool", "name": name}
+            )
+            return next(block.input for block in response.content if block.type == 'tool_use')
+        except Exception as e:
+            raise Exception(f"Anthropic API request failed: {str(e)}")
+
     def _cleanup(self):
         """Force terminate any running LLM processes"""
         if self.llm_type == 'ollama':
             try:
                 # Force terminate Ollama process
-                requests.post(f"{self.base_url}/api/terminate")
+                self._http.post(f"{self.base_url}/api/terminate")
             except:
                 pass
 
@@ -144,11 +439,12 @@ class LLMWrapper:
                 pass
 
     def _prepare_llama_kwargs(self, kwargs):
+        params = {**self._defaults, **kwargs}
         llama_kwargs = {
-            'max_tokens': kwargs.get('max_tokens', self.llm_config.get('max_tokens', 55000)),
-            'temperature': kwargs.get('temperature', self.llm_config.get('temperature', 0.7)),
-            'top_p': kwargs.get('top_p', self.llm_config.get('top_p', 0.9)),
-            'stop': kwargs.get('stop', self.llm_config.get('stop', [])),
+            'max_tokens': params['max_tokens'],
+            'temperature': params['temperature'],
+            'top_p': params['top_p'],
+            'stop': params['stop'],
             'echo': False,
         }
         return llama_kwargs
\ No newline at end of file
@@ -1,5 +1,6 @@
 import os
 import sys
+import asyncio
 import threading
 import time
 import re
@@ -673,12 +674,8 @@ class ResearchManager:
 
         return " ".join(lines).strip()
 
-    def formulate_search_queries(self, focus_area: ResearchFocus) -> List[str]:
-        """Generate search queries for a focus area"""
-        try:
-            self.print_thinking()
-
-            prompt = f"""
+    def _search_query_prompt(self, focus_area: ResearchFocus) -> str:
+        return f"""
 In order to research this query/topic:
 
 Context: {self.original_query}
@@ -695,8 +692,32 @@ Time range: [d/w/m/y/none]
 
 Do not provide any additional information or explanation, note that the time range allows you to see results within a time range (d is within the last day, w is within the last week, m is within the last month, y is within the last year, and none is results from anytime, only select one, using only the corresponding letter for whichever of these options you select as indicated in the response format) use your judgement as many searches will not require a time range and some may depending on what the research focus is.
 """
-            response_text = self.llm.generate(prompt, max_tokens=50, stop=None)
-            query, time_range = self.parse_query_response(response_text)
+
+    def draft_search_queries(self, focus_areas: List[ResearchFocus]) -> List[Optional[str]]:
+        """Generate the query responses for all focus areas concurrently, in order; None where one failed"""
+        self.print_thinking()
+        prompts = [self._search_query_prompt(focus_area) for focus_area in focus_areas]
+        try:
+            responses = asyncio.run(self.llm.generate_many(prompts, return_exceptions=True, max_tokens=50, stop=None))
+        except Exception as e:
+            logger.error(f"Error drafting search queries: {str(e)}")
+            return [None] * len(focus_areas)
+        drafts = []
+        for focus_area, response in zip(focus_areas, responses):
+            if isinstance(response, Exception):
+                logger.error(f"Error drafting search query for {focus_area.area}: {str(response)}")
+                response = None
+            drafts.append(response)
+        return drafts
+
+    def formulate_search_queries(self, focus_area: ResearchFocus, response_text: Optional[str] = None) -> List[str]:
+        """Generate search queries for a focus area, or parse a response already drafted for it"""
+        try:
+            if response_text is None:
+                self.print_thinking()
+                response_text = self.llm.generate(self._search_query_prompt(focus_area), max_tokens=50, stop=None)
+            parsed = self.parse_search_query(response_text)
+            query, time_range = parsed['query'], parsed['time_range']
 
             if not query:
                 self.ui.update_output(f"{Fore.RED}Error: Empty search query. Using focus area as query...{Style.RESET_ALL}")
@@ -761,6 +782,12 @@ Do not provide any additional information or explanation, note that the time ran
             logger.error(f"Error parsing search query: {str(e)}")
             return {'query': '', 'time_range': 'none'}
 
+    def _clean_query(self, query: str) -> str:
+        """Clean and validate search query"""
+        query = re.sub(r'["\'\[\]]', '', query)
+        query = re.sub(r'\s+', ' ', query)
+        return query.strip()[:100]
+
     def _cleanup(self):
         """Enhanced cleanup to handle conversation mode and auto-save"""
         self.conversation_active = False
@@ -792,6 +819,12 @@ Do not provide any additional information or explanation, note that the time ran
             except Exception as e:
                 logger.error(f"Error cleaning up LLM: {str(e)}")
 
+        if hasattr(self.search_engine, 'close'):
+            try:
+                self.search_engine.close()
+            except Exception as e:
+                logger.error(f"Error closing search engine: {str(e)}")
+
         if hasattr(self.ui, 'cleanup'):
             self.ui.cleanup()
 
@@ -889,8 +922,11 @@ Do not provide any additional information or explanation, note that the time ran
                     self.ui.update_output(f"\nArea {i}: {focus.area}")
                     self.ui.update_output(f"Priority: {focus.priority}")
 
+                # Draft every area's search query up front so the LLM calls overlap
+                drafts = self.draft_search_queries(focus_areas)
+
                 # Process each focus area in priority order
-                for focus_area in focus_areas:
+                for focus_area, draft in zip(focus_areas, drafts):
                     if self.should_terminate.is_set():
                         break
 
@@ -904,7 +940,7 @@ Do not provide any additional information or explanation, note that the time ran
                     self.current_focus = focus_area
                     self.ui.update_output(f"\nInvestigating: {focus_area.area}")
 
-                    queries = self.formulate_search_queries(focus_area)
+                    queries = self.formulate_search_queries(focus_area, draft)
                     if not queries:
                         continue
 
@@ -931,9 +967,9 @@ Do not provide any additional information or explanation, note that the time ran
                                     self.ui.update_output("\n⚙️ Scraping selected pages...")
                                     scraped_content = self.search_engine.scrape_content(selected_urls)
                                     if scraped_content:
-                                        for url, content in scraped_content.items():
+                                        for url, doc in scraped_content.items():
                                             if url not in self.searched_urls:
-                                                self.add_to_document(content, url, focus_area.area)
+                                                self.add_to_document(doc.raw, url, focus_area.area)
 
                         except Exception as e:
                             logger.error(f"Error in search: {str(e)}")
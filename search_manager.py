@@ -1,19 +1,63 @@
 """
 SearchManager handles search provider selection, fallback, and result normalization.
 """
+import concurrent.futures as cf
+import copy
+import hashlib
+import json
 import logging
-from typing import Dict, List, Any, Optional
+import socket
+import threading
+import time
+from collections import ChainMap, OrderedDict
+from dataclasses import asdict, dataclass
+from concurrent.futures import Future
+from types import MappingProxyType
+from typing import Dict, List, Any, Mapping, Optional, Tuple
 from time import sleep
 
+import requests
+
 from system_config import get_search_config
 from search_providers.factory import SearchProviderFactory
 
 logger = logging.getLogger(__name__)
 
+# Shared stand-in for providers without configured settings
+_EMPTY = MappingProxyType({})
+
+def truncate(text: str, limit: int) -> str:
+    """Return text cut to limit characters, without copying it when it already fits."""
+    return text if len(text) <= limit else text[:limit]
+
+@dataclass(slots=True)
+class SearchResult:
+    """A single normalized search result."""
+    title: str
+    url: str
+    content: str
+    score: float
+    published_date: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
 class SearchManager:
     """
     Manages multiple search providers with fallback support and result normalization.
     """
+
+    # Where each provider keeps the fields of the standard result format.
+    # A score of None means the provider has no relevance scores (reported as 1.0),
+    # a published_date of None means it has no dates.
+    _FIELD_MAP: Dict[str, Dict[str, Optional[str]]] = {
+        'tavily': {'url': 'url', 'content': 'content', 'score': 'score', 'published_date': 'published_date'},
+        'brave': {'url': 'url', 'content': 'description', 'score': 'relevance_score', 'published_date': 'published_date'},
+        'bing': {'url': 'url', 'content': 'content', 'score': None, 'published_date': None},
+        'exa': {'url': 'url', 'content': 'text', 'score': 'relevance_score', 'published_date': 'published_date'},
+        'arxiv': {'url': 'link', 'content': 'summary', 'score': 'score', 'published_date': 'published_date'},
+        'duckduckgo': {'url': 'link', 'content': 'snippet', 'score': None, 'published_date': None},
+    }
     
     def __init__(self, tavily_api_key=None, brave_api_key=None, bing_api_key=None, exa_api_key=None):
         """Initialize SearchManager with configuration and providers."""
@@ -21,6 +65,25 @@ class SearchManager:
         self.factory = SearchProviderFactory()
         self.providers = self._initialize_providers(tavily_api_key, brave_api_key, bing_api_key, exa_api_key)
         self.current_provider = self.config["default_provider"]
+
+        # Provider settings resolved once; searches layer their kwargs over these without copying
+        self._merged_params: Dict[str, MappingProxyType] = {
+            name: MappingProxyType(dict(self.config["provider_settings"].get(name, {})))
+            for name in self.providers
+        }
+
+        # LRU result cache: key -> (stored_at, normalized_results)
+        self._cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._cache_max_size = self.config["cache"]["max_size"]
+        self._cache_ttl = self.config["cache"]["ttl"]
+        self._cache_lock = threading.Lock()
+
+        # Searches currently being dispatched, so identical concurrent queries share one provider call
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+
+        # Until when to skip providers after a search found the network unreachable
+        self._net_cooldown_until = 0.0
         
     def _initialize_providers(self, tavily_api_key=None, brave_api_key=None, bing_api_key=None, exa_api_key=None) -> Dict[str, Any]:
         """Initialize all configured search providers."""
@@ -40,11 +103,11 @@ class SearchManager:
 
                 if provider.is_configured():
                     providers[provider_name] = provider
-                    logger.info(f"Successfully initialized {provider_name} provider")
+                    logger.info("Successfully initialized %s provider", provider_name)
                 else:
-                    logger.warning(f"Provider {provider_name} not properly configured")
+                    logger.warning("Provider %s not properly configured", provider_name)
             except Exception as e:
-                logger.error(f"Failed to initialize {provider_name} provider: {str(e)}")
+                logger.error("Failed to initialize %s provider: %s", provider_name, e)
         return providers
     
     def _normalize_results(self, results: Dict[str, Any], provider: str) -> Dict[str, Any]:
@@ -55,17 +118,14 @@ class SearchManager:
         {
             'success': bool,
             'error': Optional[str],
-            'results': List[{
-                'title': str,
-                'url': str,
-                'content': str,
-                'score': float,
-                'published_date': Optional[str]
-            }],
+            'results': List[SearchResult],
             'answer': Optional[str],  # For providers that support AI-generated answers
             'provider': str
         }
         """
+        if provider == 'duckduckgo' and isinstance(results, list):
+            results = {'results': results}
+
         if not isinstance(results, dict):
             return {
                 'success': False,
@@ -74,10 +134,11 @@ class SearchManager:
                 'provider': provider
             }
             
-        if 'error' in results:
+        # arXiv reports failures as {'status': 'error', 'message': ...} rather than an 'error' key
+        if 'error' in results or results.get('status') == 'error':
             return {
                 'success': False,
-                'error': results['error'],
+                'error': results.get('error') or results.get('message', f'Search with {provider} failed'),
                 'results': [],
                 'provider': provider
             }
@@ -94,75 +155,122 @@ class SearchManager:
             normalized['answer'] = results['answer']
             
         # Normalize results based on provider
-        if provider == 'tavily':
-            # Handle both general and news results from Tavily
-            if 'articles' in results:
-                normalized['results'] = [{
-                    'title': r.get('title', ''),
-                    'url': r.get('url', ''),
-                    'content': r.get('content', '')[:500],
-                    'score': float(r.get('score', 0.0)),
-                    'published_date': r.get('published_date')
-                } for r in results.get('articles', [])]
-            else:
-                normalized['results'] = results.get('results', [])
-        elif provider == 'brave':
-            normalized['results'] = [{
-                'title': r.get('title', ''),
-                'url': r.get('url', ''),
-                'content': r.get('description', '')[:500],
-                'score': float(r.get('relevance_score', 0.0)),
-                'published_date': r.get('published_date')
-            } for r in results.get('results', [])]
-        elif provider == 'bing':
-            normalized['results'] = [{
-                'title': r.get('title', ''),
-                'url': r.get('url', ''),
-                'content': r.get('content', '')[:500],
-                'score': 1.0,  # Bing doesn't provide relevance scores
-                'published_date': None
-            } for r in results.get('results', [])]
-        elif provider == 'exa':
-            normalized['results'] = [{
-                'title': r.get('title', ''),
-                'url': r.get('url', ''),
-                'content': r.get('text', '')[:500],
-                'score': float(r.get('relevance_score', 0.0)),
-                'published_date': r.get('published_date')
-            } for r in results.get('results', [])]
-        elif provider == 'arxiv':
-            normalized['results'] = [{
-                'title': r.get('title', ''),
-                'url': r.get('link', ''),
-                'content': r.get('summary', '')[:500],
-                'score': float(r.get('score', 0.0)),
-                'published_date': r.get('published_date')
-            } for r in results.get('results', [])]
-        elif provider == 'duckduckgo':
-            if not isinstance(results, list):
-                results = []
-            normalized['results'] = [{
-                'title': r.get('title', ''),
-                'url': r.get('link', ''),
-                'content': r.get('snippet', '')[:500],
-                'score': 1.0,  # DuckDuckGo doesn't provide relevance scores
-                'published_date': None
-            } for r in results]
+        fields = self._FIELD_MAP.get(provider)
+        if fields is None:
+            return normalized
+
+        url_key, content_key = fields['url'], fields['content']
+        score_key, date_key = fields['score'], fields['published_date']
+        rows = results['articles'] if 'articles' in results else results.get('results', [])
+        # Bind to locals once; this loop runs for every result of every search
+        _SR = SearchResult
+        _float = float
+        _t = truncate
+        normalized['results'] = out = []
+        append = out.append
+        for r in rows:
+            _get = r.get
+            append(_SR(
+                _get('title', ''),
+                _get(url_key, ''),
+                _t(_get(content_key, ''), 500),
+                _float(_get(score_key, 0.0)) if score_key else 1.0,
+                _get(date_key) if date_key else None
+            ))
             
         return normalized
     
+    def _cache_key(self, query: str, kwargs: Dict[str, Any]) -> str:
+        """
+        Build a cache key from the normalized query and search parameters.
+        The provider is left out: the answering provider is only known after the
+        fallback chain has run, and any provider's answer serves the same query.
+        """
+        params = json.dumps(kwargs, sort_keys=True, default=str)
+        raw = f"{query.strip().lower()}|{params}"
+        return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+    def _cache_get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of a fresh cached result, or None on a miss."""
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            stored_at, results = entry
+            if time.time() - stored_at >= self._cache_ttl:
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+        cached = copy.deepcopy(results)
+        cached['cached'] = True
+        return cached
+
+    @staticmethod
+    def _is_cacheable(results: Dict[str, Any]) -> bool:
+        """Only successful searches that found something are worth replaying."""
+        return bool(results['success'] and results['results'])
+
+    def _cache_set(self, key: str, results: Dict[str, Any]):
+        """Store a successful result, evicting the least recently used entry when full."""
+        if not self._is_cacheable(results):
+            return
+        with self._cache_lock:
+            self._cache[key] = (time.time(), copy.deepcopy(results))
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._cache_max_size:
+                self._cache.popitem(last=False)
+
     def search(self, query: str, **kwargs) -> Dict[str, Any]:
         """
         Perform a search using configured providers with fallback support.
+        Successful searches that return results are cached for a short TTL so repeated queries skip the provider.
         """
+        cache_key = self._cache_key(query, kwargs)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
+        if time.time() < self._net_cooldown_until:
+            return self._network_down_result()
+
+        with self._inflight_lock:
+            future = self._inflight.get(cache_key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._inflight[cache_key] = future
+
+        if not is_owner:
+            # No timeout: the owner always settles the future, and a serial fallback chain
+            # (request timeouts plus cooldowns between providers) can far outlast search_timeout
+            return copy.deepcopy(future.result())
+
+        try:
+            results = self._search_providers(query, **kwargs)
+            self._cache_set(cache_key, results)
+            future.set_result(results)
+            return results
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[cache_key]
+
+    def _search_providers(self, query: str, **kwargs) -> Dict[str, Any]:
+        """Try the current provider, then the fallback order, until one succeeds."""
+        if self.config.get("parallel_fanout"):
+            return self._search_parallel(query, **kwargs)
+
         tried_providers = set()
+        # Consecutive connection failures within this search only
+        net_failures = 0
         
         # First try the default provider
         if self.current_provider in self.providers:
             try:
                 provider = self.providers[self.current_provider]
-                provider_settings = self.config["provider_settings"].get(self.current_provider, {})
-                search_params = {**provider_settings, **kwargs}
+                search_params = self._params_for(self.current_provider, kwargs)
                 
                 results = provider.search(query, **search_params)
                 normalized_results = self._normalize_results(results, self.current_provider)
@@ -171,10 +279,15 @@ class SearchManager:
                     return normalized_results
                     
                 logger.warning(
-                    f"Search with default provider {self.current_provider} failed: {normalized_results.get('error')}"
+                    "Search with default provider %s failed: %s", self.current_provider, normalized_results.get('error')
                 )
             except Exception as e:
-                logger.error(f"Error using default provider {self.current_provider}: {str(e)}")
+                logger.error("Error using default provider %s: %s", self.current_provider, e)
+                net_failures = net_failures + 1 if self._is_network_error(e) else 0
+                if net_failures >= 2:
+                    return self._start_network_cooldown()
+            else:
+                net_failures = 0
             
             tried_providers.add(self.current_provider)
         
@@ -188,8 +301,7 @@ class SearchManager:
             
             try:
                 # Get provider-specific settings
-                provider_settings = self.config["provider_settings"].get(provider_name, {})
-                search_params = {**provider_settings, **kwargs}
+                search_params = self._params_for(provider_name, kwargs)
                 
                 # Perform search
                 results = provider.search(query, **search_params)
@@ -201,11 +313,16 @@ class SearchManager:
                     return normalized_results
                     
                 logger.warning(
-                    f"Search with {provider_name} failed: {normalized_results.get('error')}"
+                    "Search with %s failed: %s", provider_name, normalized_results.get('error')
                 )
                 
             except Exception as e:
-                logger.error(f"Error using {provider_name} provider: {str(e)}")
+                logger.error("Error using %s provider: %s", provider_name, e)
+                net_failures = net_failures + 1 if self._is_network_error(e) else 0
+                if net_failures >= 2:
+                    return self._start_network_cooldown()
+            else:
+                net_failures = 0
                 
             # Apply rate limiting before trying next provider
             sleep(self.config["rate_limiting"]["cooldown_period"] / len(self.providers))
@@ -218,6 +335,138 @@ class SearchManager:
             'provider': None
         }
     
+    def _params_for(self, provider_name: str, kwargs: Dict[str, Any]) -> Mapping[str, Any]:
+        """Search parameters for a provider: its configured settings, overridden by kwargs."""
+        base = self._merged_params.get(provider_name, _EMPTY)
+        return base if not kwargs else ChainMap(kwargs, base)
+
+    @staticmethod
+    def _is_network_error(error: Exception) -> bool:
+        """Connection failures point at the local network rather than at one provider."""
+        return isinstance(error, (requests.ConnectionError, socket.gaierror))
+
+    def _start_network_cooldown(self) -> Dict[str, Any]:
+        """Called when two providers in a row were unreachable during one search."""
+        self._net_cooldown_until = time.time() + self.config["network_cooldown"]
+        logger.warning("Providers are unreachable, pausing searches for %s seconds", self.config['network_cooldown'])
+        return self._network_down_result()
+
+    def _network_down_result(self) -> Dict[str, Any]:
+        return {
+            'success': False,
+            'error': 'Network unavailable, skipping search providers',
+            'results': [],
+            'provider': None
+        }
+
+    def _search_with(self, provider_name: str, query: str, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a search against a single provider and normalize its results."""
+        search_params = self._params_for(provider_name, kwargs)
+        results = self.providers[provider_name].search(query, **search_params)
+        return self._normalize_results(results, provider_name)
+
+    def _search_parallel(self, query: str, **kwargs) -> Dict[str, Any]:
+        """
+        Query every available provider concurrently and return the first successful result,
+        so a search is bounded by the fastest healthy provider rather than the serial fallback chain.
+        """
+        candidates = [self.current_provider] + self.config["fallback_order"]
+        candidates = [name for name in dict.fromkeys(candidates) if name in self.providers]
+
+        if candidates:
+            net_failures = 0
+            executor = cf.ThreadPoolExecutor(max_workers=len(candidates))
+            futures = {executor.submit(self._search_with, name, query, kwargs): name for name in candidates}
+            try:
+                for future in cf.as_completed(futures, timeout=self.config["search_timeout"]):
+                    provider_name = futures[future]
+                    try:
+                        normalized_results = future.result()
+                    except Exception as e:
+                        logger.error("Error using %s provider: %s", provider_name, e)
+                        net_failures = net_failures + 1 if self._is_network_error(e) else 0
+                        if net_failures >= 2:
+                            return self._start_network_cooldown()
+                        continue
+
+                    net_failures = 0
+                    if normalized_results['success']:
+                        self.current_provider = provider_name
+                        return normalized_results
+
+                    logger.warning(
+                        "Search with %s failed: %s", provider_name, normalized_results.get('error')
+                    )
+            except cf.TimeoutError:
+                logger.warning("No provider answered within %s seconds", self.config['search_timeout'])
+            finally:
+                # Don't wait on the slower providers once we have an answer
+                executor.shutdown(wait=False, cancel_futures=True)
+
+        return {
+            'success': False,
+            'error': 'All search providers failed',
+            'results': [],
+            'provider': None
+        }
+
+    def batch_search(self, queries: List[str], max_parallel: int = 4, **kwargs) -> Dict[str, Dict[str, Any]]:
+        """
+        Search for several queries at once.
+
+        Uses the current provider's batch_search when it has one, so the whole batch
+        costs one provider round trip; otherwise runs single searches concurrently.
+
+        Args:
+            queries: The search query strings
+            max_parallel: Maximum number of single searches run at the same time
+            **kwargs: Search parameters applied to every query
+
+        Returns:
+            Dict mapping each query to its normalized results
+        """
+        queries = list(dict.fromkeys(queries))
+        results: Dict[str, Dict[str, Any]] = {}
+        pending = []
+        for query in queries:
+            cached = self._cache_get(self._cache_key(query, kwargs))
+            if cached is not None:
+                results[query] = cached
+            else:
+                pending.append(query)
+
+        provider_name = self.current_provider
+        provider = self.providers.get(provider_name)
+        if len(pending) > 1 and hasattr(provider, 'batch_search'):
+            try:
+                batch = provider.batch_search(pending, **self._params_for(provider_name, kwargs))
+            except Exception as e:
+                logger.error("Error using %s batch search: %s", provider_name, e)
+                batch = {}
+            for query in list(pending):
+                normalized_results = self._normalize_results(batch.get(query, {'error': 'Missing from batch response'}), provider_name)
+                # Queries the batch found nothing for get a full search with fallback instead
+                if self._is_cacheable(normalized_results):
+                    self._cache_set(self._cache_key(query, kwargs), normalized_results)
+                    results[query] = normalized_results
+                    pending.remove(query)
+
+        # Anything the batch call could not answer goes through the regular fallback chain
+        if pending:
+            with cf.ThreadPoolExecutor(max_workers=min(len(pending), max_parallel)) as executor:
+                for query, normalized_results in zip(pending, executor.map(lambda q: self.search(q, **kwargs), pending)):
+                    results[query] = normalized_results
+
+        return {query: results[query] for query in queries}
+
+    def search_many(self, queries: List[str], max_parallel: int = 4, **kwargs) -> List[Dict[str, Any]]:
+        """
+        Search for several queries and return their results in input order.
+        Repeated queries share one search; see batch_search for how the work is dispatched.
+        """
+        results = self.batch_search(queries, max_parallel=max_parallel, **kwargs)
+        return [results[query] for query in queries]
+
     def get_current_provider(self) -> str:
         """Get the name of the currently active search provider."""
         return self.current_provider
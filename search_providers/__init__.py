@@ -1,5 +1,11 @@
 from .base_provider import BaseSearchProvider
-from .tavily_provider import TavilySearchProvider
 from .factory import SearchProviderFactory
 
 __all__ = ['BaseSearchProvider', 'TavilySearchProvider', 'SearchProviderFactory']
+
+def __getattr__(name):
+    # Import the Tavily SDK only when the provider is actually used
+    if name == 'TavilySearchProvider':
+        from .tavily_provider import TavilySearchProvider
+        return TavilySearchProvider
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,11 +1,15 @@
-from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+import re
 import sys
 from pathlib import Path
+import atexit
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import threading
 import time
-import xml.etree.ElementTree as ET
-from urllib.parse import quote
+from lxml import etree
+from urllib.parse import urlencode
 
 # Add parent directory to path for imports when running as script
 if __name__ == "__main__":
@@ -14,6 +18,11 @@ if __name__ == "__main__":
 else:
     from .base_provider import BaseSearchProvider
 
+from system_config import get_scraper_config
+
+_NS = {"atom": "http://www.w3.org/2005/Atom"}
+_ENTRY = "{http://www.w3.org/2005/Atom}entry"
+
 class  ArXivSearchProvider(BaseSearchProvider): 
     """
     arXiv search implementation of the search provider interface.
@@ -21,18 +30,52 @@ class  ArXivSearchProvider(BaseSearchProvider):
     Credit: code inspired by https://medium.com/@bargadyahmed/web-scraping-and-data-collection-from-arxiv-articles-3d3f3e2532ec
     """
     BASE_SEARCH_ENDPOINT = "http://export.arxiv.org/api"
+    # Query endpoint; parameters are appended with urlencode
+    BASE = "https://export.arxiv.org/api/query"
+
+    # Terms used to route batched entries back to their queries
+    _WORD_RE = re.compile(r"\w{3,}")
+    _ANY_WORD_RE = re.compile(r"\w+")
+
+    # Parser options shared by every feed: no entity expansion or network access,
+    # and no ID table since nothing looks entries up by xml:id
+    _PARSE_OPTIONS = {"resolve_entities": False, "no_network": True, "huge_tree": False, "collect_ids": False}
+
+    # Compiled once so per-entry lookups skip tag parsing and namespace merging
+    _title_xp = etree.XPath("atom:title/text()", namespaces=_NS)
+    _summary_xp = etree.XPath("atom:summary/text()", namespaces=_NS)
+    _link_xp = etree.XPath("atom:link[@rel='alternate']/@href", namespaces=_NS)
+    _authors_xp = etree.XPath("atom:author/atom:name/text()", namespaces=_NS)
+    _published_xp = etree.XPath("atom:published/text()", namespaces=_NS)
+    _updated_xp = etree.XPath("atom:updated/text()", namespaces=_NS)
     
     def __init__(self):
         """
         Initialize the arxiv search provider.
         """
-        # search url
-        self.ARXIV_SEARCH_URL = "https://export.arxiv.org/api/query?search_query=all:"
         # abs url
         self.ARXIV_ABS_URL = "https://arxiv.org/abs/"
-        # Tracks the time of the last request
-        self.last_request_time = 0  
+        # Earliest monotonic time the next request may go out; the lock keeps
+        # concurrent callers from claiming the same slot
+        self._lock = threading.Lock()
+        self._next_ok = 0.0
         self.current_index = 0
+        # Pooled keep-alive session so repeat queries reuse the connection to arxiv.org.
+        # Only gateway errors are retried: 429 and 503 are arXiv asking us to slow down,
+        # and an adapter retry would re-hit it without waiting out the 3-second delay
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=8,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 504])
+        )
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._session.headers["User-Agent"] = get_scraper_config()["user_agent"]
+        atexit.register(self._session.close)
+        # Cached result of the is_configured() probe and when it was taken
+        self._configured: Optional[bool] = None
+        self._configured_ts: float = 0
     
     def is_configured(self) -> bool:
         """
@@ -41,18 +84,24 @@ class  ArXivSearchProvider(BaseSearchProvider):
         Returns:
             bool indicating if the arXiv provider is ready to use
         """
-        abs_resp = requests.get(self.ARXIV_ABS_URL+"1507.00123")
-        if abs_resp.status_code != 200:
-            return False
-        
-        query = "how to reduce latency"
-        encoded_query = quote(query)
-        search_resp = requests.get(self.ARXIV_SEARCH_URL+encoded_query)
-        if search_resp.status_code != 200:
-            return False
+        if self._configured is not None and time.time() - self._configured_ts < 3600:
+            return self._configured
+
+        try:
+            abs_resp = self._session.head(self.ARXIV_ABS_URL+"1507.00123", timeout=3, allow_redirects=True)
+            search_resp = self._session.get(self._query_url("all:how to reduce latency", 0, 1), timeout=3)
+            configured = abs_resp.status_code == 200 and search_resp.status_code == 200
+        except requests.RequestException:
+            configured = False
 
-        return True
+        self._configured = configured
+        self._configured_ts = time.time()
+        return configured
     
+    def close(self):
+        """Close the pooled HTTP session."""
+        self._session.close()
+
     def parse_response(self, response: requests.Response) -> Dict[str, Any]:
         """
         Parse the XML response from the arXiv API.
@@ -64,40 +113,41 @@ class  ArXivSearchProvider(BaseSearchProvider):
             Dict containing the parsed search results or error information
         """
         try:
-            # Parse the XML response
-            root = ET.fromstring(response.content)
-            namespace = {"atom": "http://www.w3.org/2005/Atom"}
-            
+            # Let urllib3 undo any gzip/deflate encoding before lxml reads the stream
+            response.raw.decode_content = True
+
             results = []
-            for entry in root.findall("atom:entry", namespace):
+            # Stream the feed and handle each entry as soon as it is complete
+            for _, entry in etree.iterparse(response.raw, events=("end",), tag=_ENTRY, **self._PARSE_OPTIONS):
                 # Extract information for each entry, with safeguards
-                title = entry.find("atom:title", namespace)
-                summary = entry.find("atom:summary", namespace)
-                link = entry.find("atom:link[@rel='alternate']", namespace)
-                authors = [
-                    author.find("atom:name", namespace).text.strip()
-                    for author in entry.findall("atom:author", namespace)
-                ]
-                published_date = entry.find("atom:published", namespace).text.strip()
-                date_obj = datetime.strptime(published_date, '%Y-%m-%dT%H:%M:%SZ')
-                published_date = date_obj.date()
-
-                updated_date = entry.find("atom:updated", namespace).text.strip()
-                date_obj = datetime.strptime(updated_date, '%Y-%m-%dT%H:%M:%SZ')
-                updated_date = date_obj.date()
+                title = self._title_xp(entry)
+                summary = self._summary_xp(entry)
+                link = self._link_xp(entry)
+                authors = [name.strip() for name in self._authors_xp(entry)]
+                # Atom timestamps are ISO-8601, so the date is just the first 10 characters
+                published_date = self._published_xp(entry)
+                published_date = published_date[0].strip()[:10] if published_date else None
+
+                updated_date = self._updated_xp(entry)
+                updated_date = updated_date[0].strip()[:10] if updated_date else None
 
                 # Add the extracted information to the results list
                 results.append({
-                    "title": title.text.strip() if title is not None else "No Title",
-                    "summary": summary.text.strip() if summary is not None else "No Summary",
-                    "link": link.attrib["href"] if link is not None else "No Link",
+                    "title": title[0].strip() if title else "No Title",
+                    "summary": summary[0].strip() if summary else "No Summary",
+                    "link": str(link[0]) if link else "No Link",
                     "authors": authors if authors else ["No Authors"],
-                    "published_date": published_date.strftime('%Y-%m-%d') if published_date else "No Date",
-                    "updated_date": updated_date.strftime('%Y-%m-%d') if updated_date else "No Date"
+                    "published_date": published_date or "No Date",
+                    "updated_date": updated_date or "No Date"
                 })
+
+                # Free the parsed entry and any siblings already processed
+                entry.clear()
+                while entry.getprevious() is not None:
+                    del entry.getparent()[0]
             self.current_index += len(results)+1  # Update the current index for the next search
             return {"results": results}
-        except ET.ParseError:
+        except etree.XMLSyntaxError:
             return {"status": "error", "message": "Failed to parse XML response."}
         except Exception as e:
             return {"status": "error", "message": f"Unexpected error: {str(e)}"}
@@ -113,36 +163,100 @@ class  ArXivSearchProvider(BaseSearchProvider):
         Returns:
             Dict containing the search results or error information
         """
-        # Check configuration of arXiv urls
-        if not self.is_configured():
-            return {'error': 'ArXiv urls not configured properly'}
-
-        # Enforce the 3-second delay between requests for the arXiv provider Gentleman's Agreement
-        current_time = time.time()
-        if current_time - self.last_request_time < 3:
-            time.sleep(3 - (current_time - self.last_request_time))
-        
-        # Encode the query to make it URL-safe
-        encoded_query = quote(query)
-        
         # Default parameters for the search query
         start = self.current_index  # Starting index for search results so that we dont repeat results
         max_results = kwargs.get("max_results", 10)  # Number of results to fetch
+
+        return self._fetch(self._query_url(f"all:{query}", start, max_results))
+
+    def batch_search(self, queries: List[str], **kwargs) -> Dict[str, Dict[str, Any]]:
+        """
+        Answer several queries with a single arXiv request by OR-ing them together,
+        then route each returned entry back to the query it matches best.
         
-        # Construct the full URL
-        url = f"{self.ARXIV_SEARCH_URL}{encoded_query}&start={start}&max_results={max_results}"
-        
-        try:
-            # Perform the HTTP GET request
-            response = requests.get(url, timeout=10)  # Added a timeout for network requests
-            response.raise_for_status()  # Raise exception for HTTP errors
-            
-            # Update the last request time
-            self.last_request_time = time.time()
+        Args:
+            queries: The search query strings
+            **kwargs: Additional search parameters; max_results applies per query
             
-            # Return the results
-            return self.parse_response(response)
+        Returns:
+            Dict mapping each query to its search results or error information
+        """
+        queries = list(dict.fromkeys(queries))
+        groups = {query: self._group_query(query) for query in queries}
+        # A query with nothing left to group would turn the OR expression into "()"
+        unbatchable = {"error": "Query has no searchable terms for a batch"}
+        results: Dict[str, Dict[str, Any]] = {query: unbatchable for query, group in groups.items() if not group}
+        queries = [query for query in queries if groups[query]]
+        if not queries:
+            return results
+
+        max_results = kwargs.get("max_results", 10)
+        search_query = " OR ".join(groups[query] for query in queries)
+        response = self._fetch(self._query_url(search_query, self.current_index, max_results * len(queries)))
+        if "results" not in response:
+            # Report in the shared provider error shape so SearchManager retries these queries one by one
+            error = {"error": response.get("message", "arXiv batch search failed")}
+            results.update((query, error) for query in queries)
+            return results
+
+        # Short queries ("AI", "ML") are matched on all their words rather than never matching
+        query_terms = [
+            set(self._WORD_RE.findall(query.lower())) or set(self._ANY_WORD_RE.findall(query.lower()))
+            for query in queries
+        ]
+        buckets = {query: [] for query in queries}
+        for result in response["results"]:
+            entry_terms = set(self._ANY_WORD_RE.findall(f"{result['title']} {result['summary']}".lower()))
+            overlaps = [len(terms & entry_terms) for terms in query_terms]
+            # Ties go to the earliest query so routing is deterministic
+            best = max(range(len(queries)), key=overlaps.__getitem__)
+            # An entry sharing no terms with any query can't be attributed to one of them
+            if overlaps[best] and len(buckets[queries[best]]) < max_results:
+                buckets[queries[best]].append(result)
+        results.update((query, {"results": entries}) for query, entries in buckets.items())
+        return results
+
+    def _group_query(self, query: str) -> str:
+        """
+        Render one query as a parenthesised group with every term bound to all:, so
+        OR-ing groups together cannot re-bind the terms of a multi-word query.
+        Returns an empty string when no terms remain.
+        """
+        # Quotes and parentheses would unbalance the group; a bare AND/OR/ANDNOT would be read as an operator
+        terms = [
+            term for term in query.replace('"', " ").replace("(", " ").replace(")", " ").split()
+            if term not in ("AND", "OR", "ANDNOT")
+        ]
+        if not terms:
+            return ""
+        return "(" + " AND ".join(f"all:{term}" for term in terms) + ")"
+
+    def _query_url(self, search_query: str, start: int, max_results: int) -> str:
+        """Build an arXiv API query URL, letting urlencode handle the escaping."""
+        params = urlencode({"search_query": search_query, "start": start, "max_results": max_results})
+        return f"{self.BASE}?{params}"
+
+    def _fetch(self, url: str) -> Dict[str, Any]:
+        """Request an arXiv API URL, honouring the request delay, and parse the feed."""
+        # Enforce the 3-second delay between requests for the arXiv provider Gentleman's Agreement.
+        # Each caller reserves the next free slot, then sleeps outside the lock until it arrives.
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_ok - now
+            self._next_ok = max(now, self._next_ok) + 3.0
+        if wait > 0:
+            time.sleep(wait)
+
+        try:
+            # Perform the HTTP GET request, streaming the body so it can be parsed incrementally
+            with self._session.get(url, timeout=10, stream=True) as response:  # Added a timeout for network requests
+                response.raise_for_status()  # Raise exception for HTTP errors
+
+                # Return the results
+                return self.parse_response(response)
         
+        except requests.ConnectionError:
+            raise  # Let SearchManager tell a network outage apart from a provider failure
         except requests.RequestException as e:
             return {"status": "error", "message": str(e)}
         except Exception as e:
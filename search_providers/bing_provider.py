@@ -5,6 +5,7 @@ from pathlib import Path
 import requests
 from datetime import datetime, timedelta
 import json
+import orjson
 
 # Add parent directory to path for imports when running as script
 if __name__ == "__main__":
@@ -110,7 +111,7 @@ class BingSearchProvider(BaseSearchProvider):
             if response.status_code != 200:
                 return {'error': f'API request failed with status {response.status_code}: {response.text}'}
             
-            response_data = response.json()
+            response_data = orjson.loads(response.content)
             
             # Process results based on search type
             if kwargs.get('topic') == 'news':
@@ -122,6 +123,8 @@ class BingSearchProvider(BaseSearchProvider):
             else:
                 return self._process_general_results(response_data)
             
+        except requests.exceptions.ConnectionError:
+            raise  # Let SearchManager tell a network outage apart from a provider failure
         except requests.exceptions.RequestException as e:
             return {'error': f'API request failed: {str(e)}'}
         except Exception as e:
@@ -4,7 +4,7 @@ import sys
 from pathlib import Path
 import requests
 from datetime import datetime, timedelta
-import json
+import orjson
 from concurrent.futures import ThreadPoolExecutor
 
 # Add parent directory to path for imports when running as script
@@ -56,7 +56,7 @@ class BraveSearchProvider(BaseSearchProvider):
         search_response = requests.get(self.WEB_SEARCH_ENDPOINT, headers=self.proheaders, params=params)
 
         if search_response.status_code == 200:
-            data = search_response.json()
+            data = orjson.loads(search_response.content)
 
             if "summarizer" in data and "key" in data["summarizer"]:
                 summarizer_key = data["summarizer"]["key"]
@@ -74,7 +74,7 @@ class BraveSearchProvider(BaseSearchProvider):
                 )
 
                 if summary_response.status_code == 200:
-                    summary_data = summary_response.json()
+                    summary_data = orjson.loads(summary_response.content)
                     try:
                         return summary_data['summary'][0]['data']
                     except (KeyError, IndexError):
@@ -126,7 +126,7 @@ class BraveSearchProvider(BaseSearchProvider):
                     params=search_params
                 )
 
-                response_data = response.json()
+                response_data = orjson.loads(response.content)
                 result = self._process_news_results(response_data, days=kwargs.get('days', 3), topic=query)
             else:
                 response = requests.get(
@@ -134,7 +134,7 @@ class BraveSearchProvider(BaseSearchProvider):
                     headers=self.headers,
                     params=search_params
                 )
-                response_data = response.json()
+                response_data = orjson.loads(response.content)
                 result = self._process_general_results(response_data)
 
             # Include summarizer response if it exists
@@ -144,6 +144,8 @@ class BraveSearchProvider(BaseSearchProvider):
             
             return result
             
+        except requests.exceptions.ConnectionError:
+            raise  # Let SearchManager tell a network outage apart from a provider failure
         except requests.exceptions.RequestException as e:
             return {'error': f'API request failed: {str(e)}'}
         except Exception as e:
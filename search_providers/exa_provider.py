@@ -2,6 +2,7 @@ from typing import Dict, Any, Optional
 import os
 import sys
 import json
+import orjson
 from pathlib import Path
 import requests
 from datetime import datetime, timedelta
@@ -100,7 +101,7 @@ class ExaSearchProvider(BaseSearchProvider):
                 json=search_params
             )
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
             
             # Process results based on whether it's a news search
             if kwargs.get('topic') == 'news':
@@ -112,6 +113,8 @@ class ExaSearchProvider(BaseSearchProvider):
             else:
                 return self._process_general_results(data)
             
+        except requests.exceptions.ConnectionError:
+            raise  # Let SearchManager tell a network outage apart from a provider failure
         except requests.exceptions.RequestException as e:
             if e.response and e.response.status_code == 401:
                 return {'error': 'Invalid Exa API key'}
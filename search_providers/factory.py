@@ -1,27 +1,38 @@
 """Factory for creating search providers based on configuration."""
 
+import importlib
 from typing import Type, Dict, Any
 from search_providers.base_provider import BaseSearchProvider
-from search_providers.bing_provider import BingSearchProvider
-from search_providers.brave_provider import BraveSearchProvider
-from search_providers.exa_provider import ExaSearchProvider
-from search_providers.tavily_provider import TavilySearchProvider
-from search_providers.arxiv_provider import ArXivSearchProvider
 from system_config import get_search_config
 
 class SearchProviderFactory:
     """
     Factory class for creating instances of search providers.
+    Provider modules are imported on first use, so only the SDKs of providers
+    that are actually instantiated get loaded.
     """
 
-    _providers: Dict[str, Type[BaseSearchProvider]] = {
-        "bing": BingSearchProvider,
-        "brave": BraveSearchProvider,
-        "exa": ExaSearchProvider,
-        "tavily": TavilySearchProvider,
-        "arxiv": ArXivSearchProvider
+    _providers: Dict[str, str] = {
+        "bing": "search_providers.bing_provider:BingSearchProvider",
+        "brave": "search_providers.brave_provider:BraveSearchProvider",
+        "exa": "search_providers.exa_provider:ExaSearchProvider",
+        "tavily": "search_providers.tavily_provider:TavilySearchProvider",
+        "arxiv": "search_providers.arxiv_provider:ArXivSearchProvider"
     }
 
+    # Provider classes already imported, keyed by provider type
+    _resolved: Dict[str, Type[BaseSearchProvider]] = {}
+
+    @classmethod
+    def _resolve(cls, provider_type: str) -> Type[BaseSearchProvider]:
+        """Import and return the class registered for a provider type."""
+        provider_class = cls._resolved.get(provider_type)
+        if provider_class is None:
+            module_name, class_name = cls._providers[provider_type].split(":")
+            provider_class = getattr(importlib.import_module(module_name), class_name)
+            cls._resolved[provider_type] = provider_class
+        return provider_class
+
     @classmethod
     def get_provider(cls, provider_type: str, **kwargs) -> BaseSearchProvider:
         """
@@ -34,19 +45,20 @@ class SearchProviderFactory:
         Returns:
             An instance of the requested search provider, or None if the provider type is invalid.
         """
-        provider_class = cls._providers.get(provider_type.lower())
-        if not provider_class:
+        provider_type = provider_type.lower()
+        if provider_type not in cls._providers:
             raise ValueError(f"Invalid search provider type: {provider_type}")
 
-        return provider_class(**kwargs)
+        return cls._resolve(provider_type)(**kwargs)
 
     @classmethod
     def get_available_providers(cls) -> Dict[str, Type[BaseSearchProvider]]:
         """
         Get a dictionary of available search provider types and their corresponding classes.
+        Note that this imports every provider module.
 
         Returns:
             A dictionary where keys are provider types (e.g., "bing", "google") and values are
             the corresponding search provider classes.
         """
-        return cls._providers
+        return {provider_type: cls._resolve(provider_type) for provider_type in cls._providers}
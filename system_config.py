@@ -3,6 +3,8 @@ System-wide configuration settings for Web Scraper, Logging, and Research compon
 """
 import logging
 import logging.handlers
+from functools import lru_cache
+from types import MappingProxyType
 
 # Web Scraper Configuration
 SCRAPER_CONFIG = {
@@ -60,6 +62,13 @@ SEARCH_CONFIG = {
     "rate_limiting": {
         "requests_per_minute": 10,
         "cooldown_period": 60     # Seconds to wait after hitting rate limit
+    },
+    "parallel_fanout": False,     # Query all providers at once and keep the first success (uses more API quota)
+    "search_timeout": 30,         # Seconds parallel fan-out waits for any provider to answer
+    "network_cooldown": 30,       # Seconds to skip providers after repeated connection failures
+    "cache": {
+        "max_size": 512,          # Maximum number of cached search results
+        "ttl": 300                # Seconds a cached result stays valid
     }
 }
 
@@ -147,6 +156,7 @@ def get_research_config():
     """Get the research configuration"""
     return RESEARCH_CONFIG
 
+@lru_cache(maxsize=1)
 def get_search_config():
-    """Get the search provider configuration"""
-    return SEARCH_CONFIG
+    """Get the search provider configuration as a shared read-only view"""
+    return MappingProxyType(SEARCH_CONFIG)
@@ -0,0 +1,18 @@
+import sys
+import types
+from pathlib import Path
+
+# The project modules live at the repository root rather than in a package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+try:
+    import llama_cpp  # noqa: F401
+except ImportError:
+    # llm_wrapper imports Llama at module level; no test loads a local model, so a
+    # placeholder module lets the rest of the wrapper be tested without the native build
+    class Llama:
+        def __init__(self, *args, **kwargs):
+            raise RuntimeError("llama_cpp is not installed")
+
+    sys.modules['llama_cpp'] = types.ModuleType('llama_cpp')
+    sys.modules['llama_cpp'].Llama = Llama
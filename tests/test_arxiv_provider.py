@@ -0,0 +1,326 @@
+import gzip
+import io
+import threading
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+from urllib3 import HTTPResponse
+
+from search_providers import arxiv_provider
+from search_providers.arxiv_provider import ArXivSearchProvider
+
+FEED = b"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <title>arXiv Query</title>
+  <entry>
+    <title> Pruning Neural Networks </title>
+    <summary> Structured pruning for neural network inference. </summary>
+    <link rel="alternate" href="https://arxiv.org/abs/2301.00001v1"/>
+    <link rel="related" title="pdf" href="https://arxiv.org/pdf/2301.00001v1"/>
+    <author><name> Ada Lovelace </name></author>
+    <author><name>Alan Turing</name></author>
+    <published>2023-01-02T10:00:00Z</published>
+    <updated>2023-02-03T11:00:00Z</updated>
+  </entry>
+  <entry>
+    <title>Quantum Error Correction</title>
+    <summary>Surface codes for quantum error correction.</summary>
+  </entry>
+</feed>
+"""
+
+
+class FakeResponse:
+    def __init__(self, body=FEED, error=None):
+        self.raw = io.BytesIO(body)
+        self.error = error
+
+    def raise_for_status(self):
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def entry(title, summary):
+    return {"title": title, "summary": summary, "link": "l", "authors": ["a"],
+            "published_date": "2023-01-01", "updated_date": "2023-01-01"}
+
+
+@pytest.fixture
+def provider():
+    provider = ArXivSearchProvider()
+    yield provider
+    provider.close()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    monkeypatch.setattr(arxiv_provider, "time", SimpleNamespace(monotonic=lambda: now[0], time=lambda: now[0], sleep=sleep))
+    return sleeps
+
+
+def test_session_does_not_retry_rate_limit_responses(provider):
+    # A retried 429/503 would reach arXiv again without the 3-second delay
+    retry = provider._session.get_adapter(ArXivSearchProvider.BASE).max_retries
+
+    assert set(retry.status_forcelist) == {502, 504}
+
+
+def test_session_is_shared_by_http_and_https(provider):
+    adapter = provider._session.get_adapter("https://export.arxiv.org/api/query")
+
+    assert provider._session.get_adapter(ArXivSearchProvider.BASE_SEARCH_ENDPOINT) is adapter
+
+
+def test_parse_response_streams_entries(provider):
+    response = FakeResponse()
+
+    parsed = provider.parse_response(response)
+
+    assert response.raw.decode_content is True
+    assert parsed["results"][0] == {
+        "title": "Pruning Neural Networks",
+        "summary": "Structured pruning for neural network inference.",
+        "link": "https://arxiv.org/abs/2301.00001v1",
+        "authors": ["Ada Lovelace", "Alan Turing"],
+        "published_date": "2023-01-02",
+        "updated_date": "2023-02-03",
+    }
+    assert provider.current_index == 3
+
+
+def test_parse_response_decodes_compressed_feeds(provider):
+    response = FakeResponse()
+    response.raw = HTTPResponse(body=io.BytesIO(gzip.compress(FEED)), headers={"Content-Encoding": "gzip"},
+                                preload_content=False, decode_content=False)
+
+    parsed = provider.parse_response(response)
+
+    assert [r["title"] for r in parsed["results"]] == ["Pruning Neural Networks", "Quantum Error Correction"]
+
+
+def test_parse_response_fills_in_missing_fields(provider):
+    parsed = provider.parse_response(FakeResponse())
+
+    missing = parsed["results"][1]
+    assert missing["link"] == "No Link"
+    assert missing["authors"] == ["No Authors"]
+    assert missing["published_date"] == missing["updated_date"] == "No Date"
+
+
+def test_parse_response_reads_only_the_alternate_link(provider):
+    body = FEED.replace(b'<link rel="alternate" href="https://arxiv.org/abs/2301.00001v1"/>', b"")
+
+    parsed = provider.parse_response(FakeResponse(body))
+
+    assert parsed["results"][0]["link"] == "No Link"
+
+
+@pytest.mark.parametrize("stamp, date", [
+    ("2023-01-02T10:00:00Z", "2023-01-02"),
+    ("  2023-01-02T10:00:00-05:00\n", "2023-01-02"),
+    ("2023-01-02", "2023-01-02"),
+])
+def test_parse_response_slices_dates(provider, stamp, date):
+    body = FEED.replace(b"2023-01-02T10:00:00Z", stamp.encode())
+
+    parsed = provider.parse_response(FakeResponse(body))
+
+    assert parsed["results"][0]["published_date"] == date
+
+
+def test_group_query_binds_every_term(provider):
+    grouped = provider._group_query('large "language" models AND (safety) OR')
+
+    assert grouped == "(all:large AND all:language AND all:models AND all:safety)"
+
+
+def test_batch_search_sends_one_grouped_query(provider, monkeypatch):
+    urls = []
+    monkeypatch.setattr(provider, "_fetch", lambda url: urls.append(url) or {"results": []})
+
+    provider.batch_search(["neural pruning", "quantum error", "neural pruning"], max_results=3)
+
+    params = parse_qs(urlparse(urls[0]).query)
+    assert len(urls) == 1
+    assert params["search_query"] == ["(all:neural AND all:pruning) OR (all:quantum AND all:error)"]
+    assert params["max_results"] == ["6"]
+
+
+def test_batch_search_routes_entries_to_best_query(provider, monkeypatch):
+    results = [
+        entry("Pruning neural networks", "magnitude pruning"),
+        entry("Quantum codes", "error correction for quantum hardware"),
+        entry("Neural pruning at scale", "pruning large networks"),
+        entry("Unrelated", "nothing in common"),
+    ]
+    monkeypatch.setattr(provider, "_fetch", lambda url: {"results": results})
+
+    batch = provider.batch_search(["neural pruning", "quantum error"], max_results=2)
+
+    assert [r["title"] for r in batch["neural pruning"]["results"]] == [
+        "Pruning neural networks", "Neural pruning at scale"
+    ]
+    assert [r["title"] for r in batch["quantum error"]["results"]] == ["Quantum codes"]
+
+
+def test_batch_search_caps_results_per_query(provider, monkeypatch):
+    results = [entry(f"Neural pruning {i}", "pruning") for i in range(5)]
+    monkeypatch.setattr(provider, "_fetch", lambda url: {"results": results})
+
+    batch = provider.batch_search(["neural pruning", "quantum error"], max_results=2)
+
+    assert len(batch["neural pruning"]["results"]) == 2
+    assert batch["quantum error"]["results"] == []
+
+
+def test_batch_search_reports_failures_per_query(provider, monkeypatch):
+    monkeypatch.setattr(provider, "_fetch", lambda url: {"status": "error", "message": "503 Service Unavailable"})
+
+    batch = provider.batch_search(["a b", "c d"])
+
+    assert batch == {"a b": {"error": "503 Service Unavailable"}, "c d": {"error": "503 Service Unavailable"}}
+
+
+def test_batch_search_of_nothing_skips_request(provider, monkeypatch):
+    monkeypatch.setattr(provider, "_fetch", lambda url: pytest.fail("unexpected request"))
+
+    assert provider.batch_search([]) == {}
+
+
+def test_batch_search_drops_entries_matching_no_query(provider, monkeypatch):
+    results = [entry("Unrelated", "nothing in common"), entry("Quantum codes", "quantum hardware")]
+    monkeypatch.setattr(provider, "_fetch", lambda url: {"results": results})
+
+    batch = provider.batch_search(["neural pruning", "quantum error"])
+
+    # Without a match the first entry would have gone to the first query as a tie
+    assert batch["neural pruning"]["results"] == []
+    assert [r["title"] for r in batch["quantum error"]["results"]] == ["Quantum codes"]
+
+
+def test_batch_search_routes_short_queries(provider, monkeypatch):
+    results = [entry("Explainable AI", "survey"), entry("Neural pruning", "pruning")]
+    monkeypatch.setattr(provider, "_fetch", lambda url: {"results": results})
+
+    batch = provider.batch_search(["neural pruning", "AI"])
+
+    assert [r["title"] for r in batch["AI"]["results"]] == ["Explainable AI"]
+    assert [r["title"] for r in batch["neural pruning"]["results"]] == ["Neural pruning"]
+
+
+def test_group_query_of_only_operators_is_empty(provider):
+    assert provider._group_query('AND OR ( "" )') == ""
+
+
+def test_batch_search_leaves_out_queries_with_nothing_to_group(provider, monkeypatch):
+    urls = []
+    monkeypatch.setattr(provider, "_fetch", lambda url: urls.append(url) or {"results": []})
+
+    batch = provider.batch_search(["neural pruning", "AND OR", "quantum error"])
+
+    params = parse_qs(urlparse(urls[0]).query)
+    assert params["search_query"] == ["(all:neural AND all:pruning) OR (all:quantum AND all:error)"]
+    assert params["max_results"] == ["20"]
+    assert batch["AND OR"] == {"error": "Query has no searchable terms for a batch"}
+
+
+def test_batch_search_of_only_ungroupable_queries_skips_request(provider, monkeypatch):
+    monkeypatch.setattr(provider, "_fetch", lambda url: pytest.fail("unexpected request"))
+
+    assert provider.batch_search(["AND", "OR"]) == {
+        "AND": {"error": "Query has no searchable terms for a batch"},
+        "OR": {"error": "Query has no searchable terms for a batch"},
+    }
+
+
+def test_fetch_spaces_requests_three_seconds_apart(provider, monkeypatch, clock):
+    monkeypatch.setattr(provider._session, "get", lambda url, **kwargs: FakeResponse())
+
+    provider._fetch("u")
+    provider._fetch("u")
+    provider._fetch("u")
+
+    assert clock == [3.0, 3.0]
+
+
+def test_concurrent_fetches_claim_distinct_slots(provider, monkeypatch):
+    monkeypatch.setattr(provider._session, "get", lambda url, **kwargs: FakeResponse())
+    waits = []
+    # Real monotonic clock, but record the waits instead of sleeping through them
+    monkeypatch.setattr(arxiv_provider, "time", SimpleNamespace(monotonic=arxiv_provider.time.monotonic, sleep=waits.append))
+
+    threads = [threading.Thread(target=provider._fetch, args=("u",)) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    # One request goes out at once; the others queue up 3 and 6 seconds behind it
+    assert sorted(round(wait) for wait in waits) == [3, 6]
+
+
+def test_query_url_escapes_parameters(provider):
+    url = provider._query_url("(all:a AND all:b) OR (all:c)", 5, 20)
+
+    params = parse_qs(urlparse(url).query)
+    assert url.startswith(ArXivSearchProvider.BASE + "?")
+    assert params == {"search_query": ["(all:a AND all:b) OR (all:c)"], "start": ["5"], "max_results": ["20"]}
+
+
+def test_search_starts_at_current_index(provider, monkeypatch):
+    urls = []
+    monkeypatch.setattr(provider, "_fetch", lambda url: urls.append(url) or {"results": []})
+    provider.current_index = 7
+
+    provider.search("llm latency", max_results=4)
+
+    params = parse_qs(urlparse(urls[0]).query)
+    assert params == {"search_query": ["all:llm latency"], "start": ["7"], "max_results": ["4"]}
+
+
+def test_fetch_reraises_connection_errors(provider, monkeypatch, clock):
+    def get(url, **kwargs):
+        raise requests.ConnectionError("unreachable")
+
+    monkeypatch.setattr(provider._session, "get", get)
+
+    with pytest.raises(requests.ConnectionError):
+        provider._fetch("u")
+
+
+def test_parse_response_reports_malformed_xml(provider):
+    parsed = provider.parse_response(FakeResponse(b"<feed><entry>"))
+
+    assert parsed == {"status": "error", "message": "Failed to parse XML response."}
+
+
+def test_parse_response_does_not_expand_entities(provider):
+    body = b"""<?xml version="1.0"?>
+<!DOCTYPE feed [<!ENTITY xxe SYSTEM "file:///etc/hostname">]>
+<feed xmlns="http://www.w3.org/2005/Atom"><entry><title>&xxe;</title></entry></feed>"""
+
+    parsed = provider.parse_response(FakeResponse(body))
+
+    assert parsed["results"][0]["title"] == "No Title"
+
+
+def test_fetch_reports_http_errors(provider, monkeypatch, clock):
+    monkeypatch.setattr(provider._session, "get",
+                        lambda url, **kwargs: FakeResponse(error=requests.HTTPError("503 Server Error")))
+
+    assert provider._fetch("u") == {"status": "error", "message": "503 Server Error"}
@@ -0,0 +1,199 @@
+import json
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import llm_cache
+from llm_cache import LLMCache, SemanticLLMCache
+
+VECTORS = {
+    'how do I reduce latency': [1.0, 0.0, 0.0],
+    'how can I reduce latency': [0.99, 0.05, 0.0],
+    'what is a transformer': [0.0, 1.0, 0.0],
+    'something else entirely': [0.0, 0.0, 1.0],
+}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache, 'time', SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def embed(prompt):
+    return VECTORS[prompt]
+
+
+def semantic(tmp_path, **kwargs):
+    return SemanticLLMCache(embed=embed, path=str(tmp_path / 'semantic'), **kwargs)
+
+
+def test_llm_cache_round_trip(tmp_path):
+    cache = LLMCache(path=str(tmp_path / 'cache.json'))
+
+    assert cache.get('k') is None
+    cache.set('k', 'response')
+
+    assert cache.get('k') == 'response'
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_llm_cache_entries_expire(tmp_path, clock):
+    cache = LLMCache(path=str(tmp_path / 'cache.json'), ttl=60)
+    cache.set('k', 'response')
+
+    clock[0] += 59
+    assert cache.get('k') == 'response'
+    clock[0] += 1
+    assert cache.get('k') is None
+
+
+def test_llm_cache_drops_expired_entries_on_store(tmp_path, clock):
+    cache = LLMCache(path=str(tmp_path / 'cache.json'), ttl=60)
+    cache.set('old', 'response')
+
+    clock[0] += 60
+    cache.set('new', 'response')
+
+    assert list(cache._entries) == ['new']
+
+
+def test_llm_cache_evicts_oldest_beyond_max_entries(tmp_path, clock):
+    cache = LLMCache(path=str(tmp_path / 'cache.json'), max_entries=2)
+    for key in ('a', 'b', 'a', 'c'):
+        clock[0] += 1
+        cache.set(key, key.upper())
+
+    # Re-storing 'a' made 'b' the oldest
+    assert list(cache._entries) == ['a', 'c']
+
+
+def test_llm_cache_batches_saves_and_flushes(tmp_path):
+    path = tmp_path / 'cache.json'
+    cache = LLMCache(path=str(path), save_every=2)
+
+    cache.set('a', 'A')
+    assert not path.exists()
+    cache.set('b', 'B')
+    assert set(json.loads(path.read_text(encoding='utf-8'))) == {'a', 'b'}
+
+    cache.set('c', 'C')
+    cache.flush()
+    assert set(json.loads(path.read_text(encoding='utf-8'))) == {'a', 'b', 'c'}
+
+
+def test_llm_cache_persists_between_instances(tmp_path, clock):
+    path = str(tmp_path / 'nested' / 'cache.json')
+    cache = LLMCache(path=path, ttl=60)
+    cache.set('k', 'response')
+    cache.flush()
+
+    assert LLMCache(path=path, ttl=60).get('k') == 'response'
+    clock[0] += 60
+    assert LLMCache(path=path, ttl=60)._entries == {}
+
+
+def test_llm_cache_loads_only_newest_max_entries(tmp_path, clock):
+    path = str(tmp_path / 'cache.json')
+    cache = LLMCache(path=path)
+    for key in ('a', 'b', 'c'):
+        cache.set(key, key.upper())
+    cache.flush()
+
+    assert list(LLMCache(path=path, max_entries=2)._entries) == ['b', 'c']
+
+
+def test_llm_cache_ignores_corrupt_file(tmp_path):
+    path = tmp_path / 'cache.json'
+    path.write_text('{not json', encoding='utf-8')
+
+    cache = LLMCache(path=str(path))
+    cache.set('k', 'response')
+    cache.flush()
+
+    assert json.loads(path.read_text(encoding='utf-8'))['k']['response'] == 'response'
+
+
+def test_semantic_cache_matches_near_duplicates(tmp_path):
+    cache = semantic(tmp_path)
+    cached, vector = cache.lookup('how do I reduce latency', 'p')
+    cache.store(vector, 'use batching', 'p')
+
+    assert cached is None
+    assert cache.lookup('how can I reduce latency', 'p')[0] == 'use batching'
+    assert cache.lookup('what is a transformer', 'p')[0] is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_semantic_cache_is_scoped_to_generation_params(tmp_path):
+    cache = semantic(tmp_path)
+    cache.store(np.array(embed('how do I reduce latency'), dtype=np.float32), 'use batching', 'p')
+
+    assert cache.lookup('how do I reduce latency', 'other')[0] is None
+    assert cache.lookup('how do I reduce latency', 'p')[0] == 'use batching'
+
+
+def test_semantic_cache_entries_expire(tmp_path, clock):
+    cache = semantic(tmp_path, ttl=60)
+    cache.store(np.array(embed('how do I reduce latency'), dtype=np.float32), 'use batching', 'p')
+
+    clock[0] += 60
+
+    assert cache.lookup('how do I reduce latency', 'p')[0] is None
+
+
+def test_semantic_cache_evicts_oldest_beyond_max_entries(tmp_path, clock):
+    cache = semantic(tmp_path, max_entries=2)
+    for prompt in ('how do I reduce latency', 'what is a transformer', 'something else entirely'):
+        clock[0] += 1
+        cache.store(np.array(embed(prompt), dtype=np.float32), prompt.upper(), 'p')
+
+    assert [entry['response'] for entry in cache._entries] == ['WHAT IS A TRANSFORMER', 'SOMETHING ELSE ENTIRELY']
+    assert cache._vectors.shape == (2, 3)
+    assert cache.lookup('how do I reduce latency', 'p')[0] is None
+
+
+def test_semantic_cache_skips_blank_responses(tmp_path):
+    cache = semantic(tmp_path)
+    vector = np.array(embed('how do I reduce latency'), dtype=np.float32)
+
+    cache.store(vector, '', 'p')
+    cache.store(vector, '  \n', 'p')
+
+    assert cache._entries == []
+
+
+def test_semantic_cache_batches_saves_and_flushes(tmp_path):
+    cache = semantic(tmp_path, save_every=2)
+    vectors_path = tmp_path / 'semantic.npy'
+
+    cache.store(np.array(embed('how do I reduce latency'), dtype=np.float32), 'one', 'p')
+    assert not vectors_path.exists()
+    cache.store(np.array(embed('what is a transformer'), dtype=np.float32), 'two', 'p')
+    assert np.load(vectors_path).shape == (2, 3)
+
+    cache.store(np.array(embed('something else entirely'), dtype=np.float32), 'three', 'p')
+    cache.flush()
+
+    reloaded = semantic(tmp_path)
+    assert [entry['response'] for entry in reloaded._entries] == ['one', 'two', 'three']
+    assert reloaded.lookup('how can I reduce latency', 'p')[0] == 'one'
+
+
+def test_semantic_cache_rejects_inconsistent_files(tmp_path):
+    np.save(tmp_path / 'semantic.npy', np.ones((2, 3), dtype=np.float32))
+    (tmp_path / 'semantic.json').write_text(json.dumps(['old format', 'responses']), encoding='utf-8')
+
+    assert semantic(tmp_path)._entries == []
+
+
+def test_semantic_cache_resets_when_embedding_size_changes(tmp_path):
+    cache = semantic(tmp_path)
+    cache.store(np.array([1.0, 0.0, 0.0], dtype=np.float32), 'old', 'p')
+
+    cache.store(np.array([1.0, 0.0], dtype=np.float32), 'new', 'p')
+
+    assert [entry['response'] for entry in cache._entries] == ['new']
+    assert cache._vectors.shape == (1, 2)
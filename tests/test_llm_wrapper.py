@@ -0,0 +1,300 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import llm_wrapper
+from llm_cache import LLMCache
+from llm_wrapper import LLMWrapper
+
+
+class FakeSemanticCache:
+    def __init__(self, cached=None):
+        self.cached = cached
+        self.lookups = []
+        self.stored = []
+
+    def lookup(self, prompt, params):
+        self.lookups.append((prompt, params))
+        return self.cached, 'vector'
+
+    def store(self, vector, response, params):
+        self.stored.append((vector, response, params))
+
+
+@pytest.fixture
+def wrapper(tmp_path):
+    """An LLMWrapper wired to a temporary cache, with generation replaced by a recorder."""
+    llm = LLMWrapper.__new__(LLMWrapper)
+    llm.llm_type = 'openai'
+    llm.llm_config = {'model_name': 'test-model'}
+    llm._defaults = {'temperature': 0.7, 'top_p': 0.9, 'max_tokens': 64, 'stop': [],
+                     'presence_penalty': 0, 'frequency_penalty': 0}
+    llm._cache_config = {'path': str(tmp_path / 'cache.json'), 'ttl': 3600}
+    llm._cache = None
+    llm._cache_init_lock = llm_wrapper.threading.Lock()
+    llm.cache_max_temperature = 0.2
+    llm.semantic_cache = None
+    llm.responses = []
+    llm.calls = []
+
+    def generate(prompt, **kwargs):
+        llm.calls.append((prompt, kwargs))
+        return llm.responses.pop(0) if llm.responses else f'answer to {prompt}'
+
+    llm._generate = generate
+    return llm
+
+
+def test_low_temperature_calls_are_cached(wrapper):
+    first = wrapper.generate('prompt', temperature=0.1)
+    second = wrapper.generate('prompt', temperature=0.1)
+
+    assert first == second == 'answer to prompt'
+    assert len(wrapper.calls) == 1
+
+
+def test_default_temperature_bypasses_cache(wrapper):
+    wrapper.generate('prompt')
+    wrapper.generate('prompt')
+
+    assert len(wrapper.calls) == 2
+
+
+def test_cache_is_only_built_for_cacheable_calls(wrapper):
+    wrapper.generate('prompt')
+    assert wrapper._cache is None
+
+    wrapper.generate('prompt', temperature=0)
+    assert isinstance(wrapper._cache, LLMCache)
+
+
+def test_blank_completions_are_not_cached(wrapper):
+    wrapper.responses = ['  ', 'real answer']
+
+    assert wrapper.generate('prompt', temperature=0) == '  '
+    assert wrapper.generate('prompt', temperature=0) == 'real answer'
+    assert wrapper.generate('prompt', temperature=0) == 'real answer'
+    assert len(wrapper.calls) == 2
+
+
+def test_cache_key_covers_generation_settings(wrapper):
+    base = wrapper._cache_key('prompt', temperature=0.1)
+
+    assert base == wrapper._cache_key('prompt', temperature=0.1, presence_penalty=1)
+    assert base != wrapper._cache_key('prompt', temperature=0.0)
+    assert base != wrapper._cache_key('prompt', temperature=0.1, max_tokens=32)
+    assert base != wrapper._cache_key('other prompt', temperature=0.1)
+
+
+def test_semantic_cache_is_keyed_by_generation_settings(wrapper):
+    wrapper.semantic_cache = FakeSemanticCache()
+
+    wrapper.generate('prompt', semantic_cache=True, max_tokens=16)
+
+    params = wrapper._params_key(max_tokens=16)
+    assert wrapper.semantic_cache.lookups == [('prompt', params)]
+    assert wrapper.semantic_cache.stored == [('vector', 'answer to prompt', params)]
+    assert params != wrapper._params_key(max_tokens=32)
+
+
+def test_semantic_cache_hit_skips_generation(wrapper):
+    wrapper.semantic_cache = FakeSemanticCache(cached='cached answer')
+
+    assert wrapper.generate('prompt', semantic_cache=True) == 'cached answer'
+    assert wrapper.calls == []
+
+
+def test_semantic_lookup_failure_falls_back_to_generation(wrapper):
+    class BrokenCache(FakeSemanticCache):
+        def lookup(self, prompt, params):
+            raise RuntimeError('embedding endpoint down')
+
+    wrapper.semantic_cache = BrokenCache()
+
+    assert wrapper.generate('prompt', semantic_cache=True) == 'answer to prompt'
+    assert wrapper.semantic_cache.stored == []
+
+
+@pytest.mark.parametrize('text', ['not json', '[1, 2]', '"string"'])
+def test_parse_json_object_rejects_non_objects(wrapper, text):
+    with pytest.raises(ValueError):
+        wrapper._parse_json_object(text)
+
+
+def test_parse_json_object_returns_dict(wrapper):
+    assert wrapper._parse_json_object('{"a": 1}') == {'a': 1}
+
+
+class FakeStreamResponse:
+    def __init__(self, lines, status_code=200, text=''):
+        self.lines = lines
+        self.status_code = status_code
+        self.text = text
+        self.read = []
+        self.closed = False
+
+    def iter_lines(self):
+        for line in self.lines:
+            self.read.append(line)
+            yield line
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.closed = True
+        return False
+
+
+class FakeSession:
+    def __init__(self, response):
+        self.response = response
+        self.posts = []
+
+    def post(self, url, **kwargs):
+        self.posts.append((url, kwargs))
+        return self.response
+
+
+@pytest.fixture
+def ollama(wrapper):
+    wrapper.llm_type = 'ollama'
+    wrapper.base_url = 'http://localhost:11434'
+    wrapper.model_name = 'test-model'
+    return wrapper
+
+
+def test_ollama_stream_is_joined_and_stops_at_done(ollama):
+    response = FakeStreamResponse([
+        b'{"response": " Hello", "done": false}',
+        b'',
+        b'{"response": " world ", "done": false}',
+        b'{"response": "", "done": true, "total_duration": 1}',
+        b'not json, never read',
+    ])
+    ollama._http = FakeSession(response)
+
+    assert ollama._ollama_generate('prompt', max_tokens=8) == 'Hello world'
+    assert len(response.read) == 4
+    url, request = ollama._http.posts[0]
+    assert url == 'http://localhost:11434/api/generate'
+    assert request['stream'] is True
+    assert request['json']['options']['num_predict'] == 8
+    assert 'format' not in request['json']
+
+
+def test_ollama_response_is_closed_after_early_stop(ollama):
+    response = FakeStreamResponse([b'{"response": "done", "done": true}', b'{"response": "late"}'])
+    ollama._http = FakeSession(response)
+
+    ollama._ollama_generate('prompt')
+
+    assert response.closed is True
+
+
+def test_ollama_error_status_raises_and_closes_response(ollama):
+    response = FakeStreamResponse([], status_code=500, text='model not loaded')
+    ollama._http = FakeSession(response)
+
+    with pytest.raises(Exception, match='status 500: model not loaded'):
+        ollama._ollama_generate('prompt')
+    assert response.closed is True
+
+
+def test_ollama_session_pools_connections(ollama):
+    session = ollama._initialize_http_session()
+
+    adapter = session.get_adapter('http://localhost:11434')
+    assert session.get_adapter('https://example.com') is adapter
+    assert adapter._pool_maxsize == 16
+    session.close()
+
+
+class FakeAsyncOpenAI:
+    created = []
+
+    def __init__(self, **kwargs):
+        FakeAsyncOpenAI.created.append(self)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, messages, **kwargs):
+        await asyncio.sleep(0)
+        content = f" reply to {messages[0]['content']} "
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+@pytest.fixture
+def openai_async(wrapper, monkeypatch):
+    FakeAsyncOpenAI.created = []
+    monkeypatch.setattr(llm_wrapper, 'AsyncOpenAI', FakeAsyncOpenAI)
+    wrapper.model_name = 'test-model'
+    wrapper._openai_client_kwargs = {'api_key': 'key'}
+    wrapper._aclient = None
+    wrapper._aclient_loop = None
+    return wrapper
+
+
+def test_generate_many_keeps_prompt_order(openai_async):
+    responses = asyncio.run(openai_async.generate_many(['a', 'b', 'c']))
+
+    assert responses == ['reply to a', 'reply to b', 'reply to c']
+
+
+def test_async_client_is_reused_within_a_loop_only(openai_async):
+    asyncio.run(openai_async.generate_many(['a', 'b']))
+    assert len(FakeAsyncOpenAI.created) == 1
+
+    asyncio.run(openai_async.generate_many(['c']))
+    assert len(FakeAsyncOpenAI.created) == 2
+
+
+def test_generate_many_runs_thread_backends_concurrently(wrapper):
+    wrapper.llm_type = 'anthropic'
+    barrier = threading.Barrier(3, timeout=5)
+
+    def generate(prompt, **kwargs):
+        barrier.wait()  # only passes once all three prompts are in flight
+        return f'answer to {prompt}'
+
+    wrapper._generate = generate
+
+    assert asyncio.run(wrapper.generate_many(['a', 'b', 'c'])) == ['answer to a', 'answer to b', 'answer to c']
+
+
+def test_generate_many_can_return_exceptions_in_place(wrapper):
+    wrapper.llm_type = 'anthropic'
+
+    def generate(prompt, **kwargs):
+        if prompt == 'bad':
+            raise RuntimeError('boom')
+        return f'answer to {prompt}'
+
+    wrapper._generate = generate
+
+    results = asyncio.run(wrapper.generate_many(['a', 'bad', 'c'], return_exceptions=True))
+    assert results[0] == 'answer to a' and results[2] == 'answer to c'
+    assert isinstance(results[1], RuntimeError)
+
+    with pytest.raises(RuntimeError, match='boom'):
+        asyncio.run(wrapper.generate_many(['a', 'bad']))
+
+
+def test_generate_many_runs_llama_cpp_prompts_in_turn(wrapper):
+    wrapper.llm_type = 'llama_cpp'
+    active = []
+    overlapped = []
+
+    def generate(prompt, **kwargs):
+        overlapped.append(bool(active))
+        active.append(prompt)
+        time.sleep(0.01)
+        active.remove(prompt)
+        return f'answer to {prompt}'
+
+    wrapper._generate = generate
+
+    assert asyncio.run(wrapper.generate_many(['a', 'b', 'c'])) == ['answer to a', 'answer to b', 'answer to c']
+    assert overlapped == [False, False, False]
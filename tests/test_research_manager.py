@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from research_manager import ResearchFocus, ResearchManager
+
+
+class FakeUI:
+    def __init__(self):
+        self.output = []
+
+    def update_output(self, text):
+        self.output.append(text)
+
+
+class FakeLLM:
+    def __init__(self, responses):
+        self.responses = responses
+        self.batches = []
+        self.calls = []
+
+    async def generate_many(self, prompts, return_exceptions=False, **kwargs):
+        self.batches.append((prompts, return_exceptions, kwargs))
+        return [self.responses[i] for i in range(len(prompts))]
+
+    def generate(self, prompt, **kwargs):
+        self.calls.append((prompt, kwargs))
+        return self.responses[0]
+
+
+@pytest.fixture
+def make_manager():
+    def make(responses):
+        manager = ResearchManager.__new__(ResearchManager)
+        manager.llm = FakeLLM(responses)
+        manager.ui = FakeUI()
+        manager.original_query = 'how do transformers scale'
+        return manager
+    return make
+
+
+def areas(*names):
+    return [ResearchFocus(area=name, priority=i) for i, name in enumerate(names, 1)]
+
+
+def test_draft_search_queries_batches_every_focus_area(make_manager):
+    manager = make_manager(['Query: scaling laws\nTime range: y', 'Query: moe routing\nTime range: none'])
+    focus_areas = areas('Scaling laws', 'Mixture of experts')
+
+    drafts = manager.draft_search_queries(focus_areas)
+
+    assert drafts == manager.llm.responses
+    (prompts, return_exceptions, kwargs), = manager.llm.batches
+    assert [area.area in prompt for area, prompt in zip(focus_areas, prompts)] == [True, True]
+    assert return_exceptions is True
+    assert kwargs == {'max_tokens': 50, 'stop': None}
+
+
+def test_draft_search_queries_marks_failed_areas(make_manager):
+    manager = make_manager(['Query: scaling laws', RuntimeError('timeout')])
+
+    assert manager.draft_search_queries(areas('Scaling laws', 'Mixture of experts')) == ['Query: scaling laws', None]
+
+
+def test_draft_search_queries_survives_a_failed_batch(make_manager, monkeypatch):
+    manager = make_manager([])
+
+    def broken_run(coro):
+        coro.close()
+        raise RuntimeError('loop already running')
+
+    monkeypatch.setattr(asyncio, 'run', broken_run)
+
+    assert manager.draft_search_queries(areas('a', 'b')) == [None, None]
+
+
+def test_formulate_search_queries_uses_the_draft(make_manager):
+    manager = make_manager(['unused'])
+    focus, = areas('Scaling laws')
+
+    queries = manager.formulate_search_queries(focus, 'Query: "transformer scaling laws"\nTime range: y')
+
+    assert queries == ['transformer scaling laws']
+    assert manager.llm.calls == []
+    assert any('Time range: y' in line for line in manager.ui.output)
+
+
+def test_formulate_search_queries_generates_without_a_draft(make_manager):
+    manager = make_manager(['Query: moe routing\nTime range: none'])
+    focus, = areas('Mixture of experts')
+
+    assert manager.formulate_search_queries(focus) == ['moe routing']
+    assert len(manager.llm.calls) == 1
+
+
+def test_formulate_search_queries_falls_back_to_focus_area(make_manager):
+    manager = make_manager([])
+    focus, = areas('Mixture of experts')
+
+    assert manager.formulate_search_queries(focus, 'no query here') == ['Mixture of experts']
@@ -0,0 +1,449 @@
+import copy
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+import search_manager
+from search_manager import SearchManager, SearchResult
+
+
+class FakeProvider:
+    """Records every call and answers with a canned response or exception."""
+
+    def __init__(self, response=None, error=None, delay=None):
+        self.response = response
+        self.error = error
+        self.delay = delay
+        self.calls = []
+
+    def search(self, query, **kwargs):
+        self.calls.append((query, dict(kwargs)))
+        if self.delay is not None:
+            self.delay.wait(5)
+        if self.error is not None:
+            raise self.error
+        if callable(self.response):
+            return self.response(query)
+        return copy.deepcopy(self.response)
+
+
+class FakeBatchProvider(FakeProvider):
+    def __init__(self, batch_response, **kwargs):
+        super().__init__(**kwargs)
+        self.batch_response = batch_response
+        self.batch_calls = []
+
+    def batch_search(self, queries, **kwargs):
+        self.batch_calls.append(list(queries))
+        return copy.deepcopy(self.batch_response)
+
+
+def ddg_rows(query):
+    return [{'title': query, 'link': f'https://example.com/{query}', 'snippet': f'about {query}'}]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(search_manager, 'time', SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+@pytest.fixture
+def make_manager(monkeypatch):
+    monkeypatch.setattr(search_manager, 'sleep', lambda seconds: None)
+
+    def make(providers, current=None):
+        monkeypatch.setattr(SearchManager, '_initialize_providers', lambda self, *args: providers)
+        manager = SearchManager()
+        if current is not None:
+            manager.current_provider = current
+        return manager
+
+    return make
+
+
+def test_cache_key_normalizes_query_and_kwarg_order(make_manager):
+    manager = make_manager({})
+
+    assert manager._cache_key('  Neural Nets ', {}) == manager._cache_key('neural nets', {})
+    assert manager._cache_key('q', {'a': 1, 'b': 2}) == manager._cache_key('q', {'b': 2, 'a': 1})
+    assert manager._cache_key('q', {'max_results': 5}) != manager._cache_key('q', {'max_results': 10})
+
+
+def test_repeated_search_is_served_from_cache(make_manager):
+    provider = FakeProvider(response=ddg_rows)
+    manager = make_manager({'duckduckgo': provider}, current='duckduckgo')
+
+    first = manager.search('python')
+    second = manager.search('  PYTHON ')
+
+    assert len(provider.calls) == 1
+    assert 'cached' not in first
+    assert second['cached'] is True
+    assert second['results'] == first['results']
+
+
+def test_cached_result_is_isolated_from_callers(make_manager):
+    manager = make_manager({'duckduckgo': FakeProvider(response=ddg_rows)}, current='duckduckgo')
+
+    manager.search('python')['results'].clear()
+
+    assert len(manager.search('python')['results']) == 1
+
+
+def test_cache_is_shared_across_providers(make_manager):
+    exa = FakeProvider(error=ValueError('exa broke'))
+    ddg = FakeProvider(response=ddg_rows)
+    manager = make_manager({'exa': exa, 'duckduckgo': ddg}, current='exa')
+
+    assert manager.search('python')['provider'] == 'duckduckgo'
+    assert manager.search('python')['cached'] is True
+    assert (len(exa.calls), len(ddg.calls)) == (1, 1)
+
+
+def test_empty_results_are_not_cached(make_manager):
+    provider = FakeProvider(response=[])
+    manager = make_manager({'duckduckgo': provider}, current='duckduckgo')
+
+    manager.search('nothing')
+    manager.search('nothing')
+
+    assert len(provider.calls) == 2
+
+
+def test_failed_searches_are_not_cached(make_manager):
+    provider = FakeProvider(response={'status': 'error', 'message': 'down'})
+    manager = make_manager({'arxiv': provider}, current='arxiv')
+
+    assert manager.search('q')['success'] is False
+    manager.search('q')
+
+    assert len(provider.calls) == 2
+
+
+def test_cache_evicts_least_recently_used(make_manager):
+    provider = FakeProvider(response=ddg_rows)
+    manager = make_manager({'duckduckgo': provider}, current='duckduckgo')
+    manager._cache_max_size = 2
+
+    manager.search('a')
+    manager.search('b')
+    manager.search('a')  # refreshes 'a', leaving 'b' as the oldest
+    manager.search('c')
+    calls_before = len(provider.calls)
+
+    assert manager.search('a')['cached'] is True
+    assert 'cached' not in manager.search('b')
+    assert len(provider.calls) == calls_before + 1
+
+
+def test_cache_entries_expire_after_ttl(make_manager, clock):
+    provider = FakeProvider(response=ddg_rows)
+    manager = make_manager({'duckduckgo': provider}, current='duckduckgo')
+
+    manager.search('q')
+    clock[0] += manager._cache_ttl - 1
+    assert manager.search('q')['cached'] is True
+
+    clock[0] += 1
+    assert 'cached' not in manager.search('q')
+    assert len(provider.calls) == 2
+
+
+def run_concurrently(manager, query, count=2, release=None, wait=0.1):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(manager.search(query))) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    time.sleep(wait)
+    if release is not None:
+        release.set()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def test_concurrent_identical_searches_share_one_call(make_manager):
+    release = threading.Event()
+    # No results, so the second caller can only be answered by the in-flight search, not the cache
+    provider = FakeProvider(response=[], delay=release)
+    manager = make_manager({'duckduckgo': provider}, current='duckduckgo')
+
+    results = run_concurrently(manager, 'q', release=release)
+
+    assert len(provider.calls) == 1
+    assert len(results) == 2
+    assert results[0] == results[1]
+    assert results[0] is not results[1]
+    assert manager._inflight == {}
+
+
+def test_waiters_outlast_search_timeout(make_manager):
+    release = threading.Event()
+    provider = FakeProvider(response=ddg_rows, delay=release)
+    manager = make_manager({'duckduckgo': provider}, current='duckduckgo')
+    manager.config = {**manager.config, 'search_timeout': 0.01}
+
+    # The owner is held well past search_timeout, as a slow serial fallback chain would be
+    results = run_concurrently(manager, 'q', release=release, wait=0.2)
+
+    assert len(provider.calls) == 1
+    assert [r['success'] for r in results] == [True, True]
+
+
+def test_parallel_fanout_returns_first_success(make_manager):
+    exa = FakeProvider(error=ValueError('exa broke'))
+    ddg = FakeProvider(response=ddg_rows)
+    manager = make_manager({'exa': exa, 'duckduckgo': ddg}, current='exa')
+    manager.config = {**manager.config, 'parallel_fanout': True}
+
+    results = manager.search('q')
+
+    assert results['provider'] == 'duckduckgo'
+    assert manager.current_provider == 'duckduckgo'
+
+
+def test_parallel_fanout_does_not_wait_for_slow_providers(make_manager):
+    release = threading.Event()
+    exa = FakeProvider(response={'results': [{'title': 'slow', 'url': 'u', 'text': 't'}]}, delay=release)
+    ddg = FakeProvider(response=ddg_rows)
+    manager = make_manager({'exa': exa, 'duckduckgo': ddg}, current='exa')
+    manager.config = {**manager.config, 'parallel_fanout': True}
+
+    try:
+        results = manager.search('q')
+    finally:
+        release.set()
+
+    assert results['provider'] == 'duckduckgo'
+    assert len(exa.calls) == 1
+
+
+def test_parallel_fanout_gives_up_after_search_timeout(make_manager):
+    release = threading.Event()
+    exa = FakeProvider(response=[], delay=release)
+    manager = make_manager({'exa': exa}, current='exa')
+    manager.config = {**manager.config, 'parallel_fanout': True, 'search_timeout': 0.05}
+
+    try:
+        results = manager.search('q')
+    finally:
+        release.set()
+
+    assert results['success'] is False
+    assert results['error'] == 'All search providers failed'
+
+
+@pytest.mark.parametrize('provider, raw, expected', [
+    ('tavily',
+     {'results': [{'title': 'T', 'url': 'u', 'content': 'c', 'score': 0.5, 'published_date': '2024-01-01'}]},
+     SearchResult('T', 'u', 'c', 0.5, '2024-01-01')),
+    ('brave',
+     {'results': [{'title': 'T', 'url': 'u', 'description': 'd', 'relevance_score': '0.25'}]},
+     SearchResult('T', 'u', 'd', 0.25, None)),
+    ('bing',
+     {'results': [{'title': 'T', 'url': 'u', 'content': 'c', 'published_date': '2024-01-01'}]},
+     SearchResult('T', 'u', 'c', 1.0, None)),
+    ('exa',
+     {'results': [{'title': 'T', 'url': 'u', 'text': 't', 'relevance_score': 0.75}]},
+     SearchResult('T', 'u', 't', 0.75, None)),
+    ('arxiv',
+     {'results': [{'title': 'T', 'link': 'l', 'summary': 's', 'published_date': '2023-05-01'}]},
+     SearchResult('T', 'l', 's', 0.0, '2023-05-01')),
+    ('duckduckgo',
+     [{'title': 'T', 'link': 'l', 'snippet': 's'}],
+     SearchResult('T', 'l', 's', 1.0, None)),
+])
+def test_normalize_maps_provider_fields(make_manager, provider, raw, expected):
+    normalized = make_manager({})._normalize_results(raw, provider)
+
+    assert normalized['success'] is True
+    assert normalized['provider'] == provider
+    assert normalized['results'] == [expected]
+
+
+def test_normalize_keeps_answer_and_reads_articles(make_manager):
+    raw = {'answer': 'A', 'articles': [{'title': 'T', 'url': 'u', 'content': 'c', 'score': 1}]}
+    normalized = make_manager({})._normalize_results(raw, 'tavily')
+
+    assert normalized['answer'] == 'A'
+    assert [r.title for r in normalized['results']] == ['T']
+
+
+@pytest.mark.parametrize('provider, raw, error', [
+    ('bing', {'error': 'quota exceeded'}, 'quota exceeded'),
+    ('arxiv', {'status': 'error', 'message': 'Failed to parse XML response.'}, 'Failed to parse XML response.'),
+    ('arxiv', {'status': 'error'}, 'Search with arxiv failed'),
+    ('exa', 'not a dict', 'Invalid results format from exa'),
+])
+def test_normalize_reports_provider_errors(make_manager, provider, raw, error):
+    normalized = make_manager({})._normalize_results(raw, provider)
+
+    assert normalized['success'] is False
+    assert normalized['error'] == error
+    assert normalized['results'] == []
+
+
+def test_normalize_unknown_provider_returns_no_results(make_manager):
+    normalized = make_manager({})._normalize_results({'results': [{'title': 'T'}]}, 'unknown')
+
+    assert normalized['success'] is True
+    assert normalized['results'] == []
+
+
+def test_search_result_to_dict():
+    result = SearchResult('T', 'u', 'c', 0.5)
+
+    assert result.to_dict() == {'title': 'T', 'url': 'u', 'content': 'c', 'score': 0.5, 'published_date': None}
+
+
+def test_search_result_has_no_instance_dict():
+    result = SearchResult('T', 'u', 'c', 0.5)
+
+    assert not hasattr(result, '__dict__')
+    with pytest.raises(AttributeError):
+        result.extra = 1
+
+
+def test_batch_search_falls_back_for_unanswered_queries(make_manager):
+    provider = FakeBatchProvider(
+        batch_response={'a': {'results': [{'title': 'A', 'link': 'l', 'summary': 's'}]}, 'b': {'results': []}},
+        response={'results': [{'title': 'B', 'link': 'l', 'summary': 's'}]}
+    )
+    manager = make_manager({'arxiv': provider}, current='arxiv')
+
+    results = manager.batch_search(['a', 'b'])
+
+    assert provider.batch_calls == [['a', 'b']]
+    assert [query for query, _ in provider.calls] == ['b']
+    assert results['a']['results'][0].title == 'A'
+    assert results['b']['results'][0].title == 'B'
+    assert manager.search('a')['cached'] is True
+
+
+def test_batch_search_skips_cached_queries(make_manager):
+    provider = FakeBatchProvider(batch_response={}, response={'results': [{'title': 'T', 'link': 'l', 'summary': 's'}]})
+    manager = make_manager({'arxiv': provider}, current='arxiv')
+    manager.search('a')
+
+    results = manager.batch_search(['a', 'b'])
+
+    # Only one query left to search, which does not warrant a batch request
+    assert provider.batch_calls == []
+    assert results['a']['cached'] is True
+    assert [query for query, _ in provider.calls] == ['a', 'b']
+
+
+def test_batch_search_falls_back_for_unbatchable_queries(make_manager):
+    provider = FakeBatchProvider(
+        batch_response={'a b': {'results': [{'title': 'A', 'link': 'l', 'summary': 's'}]},
+                        'OR': {'error': 'Query has no searchable terms for a batch'}},
+        response={'results': [{'title': 'OR', 'link': 'l', 'summary': 's'}]}
+    )
+    manager = make_manager({'arxiv': provider}, current='arxiv')
+
+    results = manager.batch_search(['a b', 'OR'])
+
+    assert [query for query, _ in provider.calls] == ['OR']
+    assert results['OR']['results'][0].title == 'OR'
+
+
+def test_search_many_preserves_order_and_dedupes(make_manager):
+    provider = FakeProvider(response=ddg_rows)
+    manager = make_manager({'duckduckgo': provider}, current='duckduckgo')
+
+    results = manager.search_many(['b', 'a', 'b'])
+
+    assert [r['results'][0].title for r in results] == ['b', 'a', 'b']
+    assert sorted(query for query, _ in provider.calls) == ['a', 'b']
+
+
+def test_search_many_batches_through_the_provider(make_manager):
+    provider = FakeBatchProvider(
+        batch_response={q: {'results': [{'title': q, 'link': 'l', 'summary': 's'}]} for q in ('a b', 'c d')},
+        response={'results': []}
+    )
+    manager = make_manager({'arxiv': provider}, current='arxiv')
+
+    results = manager.search_many(['c d', 'a b', 'c d'])
+
+    assert provider.batch_calls == [['c d', 'a b']]
+    assert provider.calls == []
+    assert [r['results'][0].title for r in results] == ['c d', 'a b', 'c d']
+
+
+def test_repeated_connection_failures_pause_searches(make_manager, clock):
+    unreachable = requests.ConnectionError('unreachable')
+    exa, bing = FakeProvider(error=unreachable), FakeProvider(error=unreachable)
+    ddg = FakeProvider(response=ddg_rows)
+    manager = make_manager({'exa': exa, 'bing': bing, 'duckduckgo': ddg}, current='exa')
+
+    assert manager.search('q')['error'] == 'Network unavailable, skipping search providers'
+    assert manager.search('other')['error'] == 'Network unavailable, skipping search providers'
+    assert (len(exa.calls), len(bing.calls), len(ddg.calls)) == (1, 1, 0)
+
+    clock[0] += manager.config['network_cooldown']
+    manager.current_provider = 'duckduckgo'
+    assert manager.search('other')['success'] is True
+    assert len(ddg.calls) == 1
+
+
+def test_connection_failures_are_counted_per_search(make_manager):
+    exa = FakeProvider(error=requests.ConnectionError('unreachable'))
+    ddg = FakeProvider(response=ddg_rows)
+    manager = make_manager({'exa': exa, 'duckduckgo': ddg})
+
+    for query in ('a', 'b', 'c'):
+        manager.current_provider = 'exa'
+        assert manager.search(query)['success'] is True
+
+    assert manager._net_cooldown_until == 0.0
+
+
+def test_provider_errors_do_not_start_network_cooldown(make_manager):
+    exa, bing = FakeProvider(error=ValueError('bad key')), FakeProvider(error=ValueError('quota'))
+    ddg = FakeProvider(response=ddg_rows)
+    manager = make_manager({'exa': exa, 'bing': bing, 'duckduckgo': ddg}, current='exa')
+
+    assert manager.search('q')['provider'] == 'duckduckgo'
+    assert manager._net_cooldown_until == 0.0
+
+
+def test_provider_settings_are_layered_under_kwargs(make_manager):
+    provider = FakeProvider(response=ddg_rows)
+    manager = make_manager({'duckduckgo': provider}, current='duckduckgo')
+
+    manager.search('q', max_results=3)
+
+    params = provider.calls[0][1]
+    assert params['max_results'] == 3
+    assert params['region'] == manager.config['provider_settings']['duckduckgo']['region']
+
+
+def test_provider_settings_are_shared_read_only_without_kwargs(make_manager):
+    manager = make_manager({'duckduckgo': FakeProvider(response=ddg_rows)})
+
+    params = manager._params_for('duckduckgo', {})
+
+    assert params is manager._params_for('duckduckgo', {})
+    with pytest.raises(TypeError):
+        params['region'] = 'elsewhere'
+    assert manager._params_for('unconfigured', {}) == {}
+
+
+def test_truncate_passes_short_text_through():
+    text = 'short'
+
+    assert search_manager.truncate(text, 10) is text
+    assert search_manager.truncate('x' * 12, 10) == 'x' * 10
+
+
+def test_normalize_truncates_long_content(make_manager):
+    raw = {'results': [{'title': 'T', 'url': 'u', 'content': 'x' * 600}]}
+    result = make_manager({})._normalize_results(raw, 'bing')['results'][0]
+
+    assert result.content == 'x' * 500
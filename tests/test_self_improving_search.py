@@ -0,0 +1,299 @@
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+import Self_Improving_Search
+from Self_Improving_Search import EnhancedSelfImprovingSearch, ScrapedDoc
+from search_manager import SearchResult
+from web_scraper import WebScraper
+
+PAGE = b"<html><head><title>T</title></head><body><main><p>Useful   page text.</p></main></body></html>"
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    """Serves /page, an empty /empty, a /flaky page that fails once, and 404s for everything else."""
+
+    def do_GET(self):
+        hits = self.server.hits
+        hits[self.path] += 1
+        if self.path == '/page' or (self.path == '/flaky' and hits[self.path] > 1):
+            status, body = 200, PAGE
+        elif self.path == '/empty':
+            status, body = 200, b"<html><body></body></html>"
+        elif self.path == '/flaky':
+            status, body = 500, b"busy"
+        else:
+            status, body = 404, b"missing"
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), PageHandler)
+    httpd.hits = Counter()
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    thread.start()
+    yield httpd, f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def search():
+    """A search engine with only the scraping state set up; no providers or LLM."""
+    engine = EnhancedSelfImprovingSearch.__new__(EnhancedSelfImprovingSearch)
+    engine._scraper = WebScraper(rate_limit=0, max_retries=2)
+    yield engine
+    engine.close()
+
+
+def test_scrape_content_fetches_and_extracts_pages(server, search):
+    httpd, base = server
+
+    scraped = search.scrape_content([f"{base}/page", f"{base}/empty"])
+
+    assert list(scraped) == [f"{base}/page"]
+    doc = scraped[f"{base}/page"]
+    assert isinstance(doc, ScrapedDoc)
+    assert doc.normalized == "Useful page text."
+
+
+def test_scrape_content_retries_failures_through_shared_scraper(server, search, monkeypatch):
+    httpd, base = server
+    retried_with = []
+    real_get_web_content = Self_Improving_Search.get_web_content
+
+    def get_web_content(urls, scraper=None):
+        retried_with.append((urls, scraper))
+        return real_get_web_content(urls, scraper)
+
+    monkeypatch.setattr(Self_Improving_Search, 'get_web_content', get_web_content)
+    monkeypatch.setattr(Self_Improving_Search.time, 'sleep', lambda seconds: None)
+
+    scraped = search.scrape_content([f"{base}/flaky", f"{base}/missing"])
+
+    assert list(scraped) == [f"{base}/flaky"]
+    assert retried_with == [([f"{base}/flaky", f"{base}/missing"], search._scraper)]
+    assert httpd.hits['/flaky'] == 2
+
+
+def test_scrape_content_skips_urls_disallowed_by_robots(server, search, monkeypatch):
+    httpd, base = server
+    monkeypatch.setattr(Self_Improving_Search, 'can_fetch', lambda url: not url.endswith('/empty'))
+
+    scraped = search.scrape_content([f"{base}/page", f"{base}/empty"])
+
+    assert list(scraped) == [f"{base}/page"]
+    assert '/empty' not in httpd.hits
+
+
+def test_fetches_reserve_the_shared_rate_limit_slots(server, search, monkeypatch):
+    httpd, base = server
+    reserved = []
+    reserve = search._scraper.reserve_request_slot
+
+    def reserve_request_slot(url):
+        reserved.append(url)
+        return reserve(url)
+
+    monkeypatch.setattr(search._scraper, 'reserve_request_slot', reserve_request_slot)
+    monkeypatch.setattr(Self_Improving_Search.time, 'sleep', lambda seconds: None)
+
+    search.scrape_content([f"{base}/page", f"{base}/flaky"])
+
+    # Both async fetches, then the retry of /flaky, claim slots on the same scraper
+    assert sorted(reserved) == sorted([f"{base}/page", f"{base}/flaky", f"{base}/flaky"])
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    monkeypatch.setattr(Self_Improving_Search, 'time', SimpleNamespace(monotonic=lambda: now[0], sleep=sleep))
+    return now, sleeps
+
+
+def make_bucket(requests_per_minute, now):
+    engine = EnhancedSelfImprovingSearch.__new__(EnhancedSelfImprovingSearch)
+    engine.requests_per_minute = requests_per_minute
+    engine._tokens = float(requests_per_minute)
+    engine._last_refill = now
+    engine._rate_lock = threading.Lock()
+    return engine
+
+
+def test_token_bucket_allows_a_burst_then_waits(clock):
+    now, sleeps = clock
+    engine = make_bucket(60, now[0])
+
+    for _ in range(60):
+        engine._acquire_search_token()
+    assert sleeps == []
+
+    engine._acquire_search_token()
+    assert sleeps == [pytest.approx(1.0)]
+
+
+def test_token_bucket_refills_over_time(clock):
+    now, sleeps = clock
+    engine = make_bucket(6, now[0])
+    engine._tokens = 0.0
+
+    now[0] += 20  # two tokens at six per minute
+    engine._acquire_search_token()
+    engine._acquire_search_token()
+    assert sleeps == []
+
+    engine._acquire_search_token()
+    assert sleeps == [pytest.approx(10.0)]
+
+
+def test_token_bucket_never_exceeds_capacity(clock):
+    now, sleeps = clock
+    engine = make_bucket(2, now[0])
+
+    now[0] += 3600
+    for _ in range(3):
+        engine._acquire_search_token()
+
+    assert sleeps == [pytest.approx(30.0)]
+
+
+class FakeLLM:
+    def __init__(self, selection=None, error=None):
+        self.selection = selection
+        self.error = error
+        self.calls = []
+
+    def generate_json(self, prompt, schema, name, **kwargs):
+        self.calls.append((schema, name, kwargs))
+        if self.error:
+            raise self.error
+        return self.selection
+
+
+def results(count):
+    return [SearchResult(title=f"T{i}", url=f"https://site{i}.test/", content="text", score=1.0) for i in range(1, count + 1)]
+
+
+@pytest.fixture
+def selector(monkeypatch):
+    """Builds a search engine around a fake LLM, with every URL allowed by robots.txt."""
+    monkeypatch.setattr(Self_Improving_Search, 'can_fetch', lambda url: True)
+
+    def make(llm):
+        engine = EnhancedSelfImprovingSearch.__new__(EnhancedSelfImprovingSearch)
+        engine.llm = llm
+        return engine
+    return make
+
+
+def test_select_relevant_pages_uses_the_json_selection(selector):
+    llm = FakeLLM({'selected': [3, 1], 'reasoning': 'best matches'})
+
+    urls = selector(llm).select_relevant_pages(results(4), 'question')
+
+    assert urls == ['https://site3.test/', 'https://site1.test/']
+    schema, name, kwargs = llm.calls[0]
+    assert (schema, name) == (EnhancedSelfImprovingSearch.SELECT_RESULTS_SCHEMA, 'select_results')
+    assert kwargs['stop'] is None
+
+
+def test_select_relevant_pages_accepts_a_search_response_dict(selector):
+    urls = selector(FakeLLM({'selected': [2]})).select_relevant_pages({'results': results(2)}, 'question')
+
+    assert urls == ['https://site2.test/']
+
+
+def test_select_relevant_pages_converts_numbers_and_skips_invalid_entries(selector):
+    selection = {'selected': [True, '2', 'two', None, 9, 0, 2, 4]}
+
+    urls = selector(FakeLLM(selection)).select_relevant_pages(results(4), 'question')
+
+    assert urls == ['https://site2.test/', 'https://site4.test/']
+
+
+def test_select_relevant_pages_skips_disallowed_urls(selector, monkeypatch):
+    monkeypatch.setattr(Self_Improving_Search, 'can_fetch', lambda url: 'site1' not in url)
+
+    urls = selector(FakeLLM({'selected': [1, 3]})).select_relevant_pages(results(3), 'question')
+
+    assert urls == ['https://site3.test/']
+
+
+@pytest.mark.parametrize('llm', [FakeLLM(error=ValueError('LLM did not return valid JSON')), FakeLLM({'selected': [False, 'x']})])
+def test_select_relevant_pages_falls_back_to_top_results(selector, llm):
+    urls = selector(llm).select_relevant_pages(results(3), 'question')
+
+    assert urls == ['https://site1.test/', 'https://site2.test/']
+
+
+class EvaluatingLLM(FakeLLM):
+    def __init__(self, evaluation=None, error=None):
+        super().__init__(evaluation, error)
+        self.generated = []
+
+    def generate(self, prompt, **kwargs):
+        self.generated.append(prompt)
+        return 'dedicated answer'
+
+
+DOCS = {'https://site1.test/': ScrapedDoc(url='https://site1.test/', raw='Some  page text.')}
+
+
+def answering_engine(llm):
+    """A search engine whose search, selection and scraping steps are canned, so only evaluation runs."""
+    engine = EnhancedSelfImprovingSearch.__new__(EnhancedSelfImprovingSearch)
+    engine.llm = llm
+    engine.max_attempts = 1
+    engine.perform_search = lambda query, time_range: {'success': True, 'provider': 'tavily', 'answer': 'summary', 'results': results(1)}
+    engine.display_search_results = lambda search_results: None
+    engine.select_relevant_pages = lambda search_results, user_query: ['https://site1.test/']
+    engine.scrape_content = lambda urls: DOCS
+    return engine
+
+
+def test_evaluate_scraped_content_returns_decision_reason_and_answer():
+    llm = EvaluatingLLM({'decision': ' Answer ', 'reason': 'covers it', 'answer': ' The answer. '})
+
+    assert answering_engine(llm).evaluate_scraped_content('question', DOCS, 'summary') == ('covers it', 'answer', 'The answer.')
+    schema, name, kwargs = llm.calls[0]
+    assert (schema, name) == (EnhancedSelfImprovingSearch.EVALUATION_SCHEMA, 'evaluate_content')
+    assert kwargs['stop'] is None
+
+
+def test_failed_evaluation_falls_through_to_answering():
+    llm = EvaluatingLLM(error=ValueError('LLM did not return valid JSON'))
+
+    assert answering_engine(llm).evaluate_scraped_content('question', DOCS) == ('Evaluation unavailable', 'answer', '')
+
+
+def test_long_embedded_answer_is_returned_without_a_second_call():
+    answer = 'x' * EnhancedSelfImprovingSearch.MIN_EMBEDDED_ANSWER_LENGTH
+    llm = EvaluatingLLM({'decision': 'answer', 'reason': 'covers it', 'answer': answer})
+
+    assert answering_engine(llm).search_and_improve('question') == answer
+    assert llm.generated == []
+
+
+def test_short_embedded_answer_gets_a_dedicated_answer_call():
+    llm = EvaluatingLLM({'decision': 'answer', 'reason': 'covers it', 'answer': 'too short'})
+
+    assert answering_engine(llm).search_and_improve('question') == 'dedicated answer'
+    assert len(llm.generated) == 1
+    assert 'AI-Generated Summary:\nsummary' in llm.generated[0]
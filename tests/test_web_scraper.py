@@ -0,0 +1,180 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import web_scraper
+from web_scraper import RobotsDiskCache, WebScraper, _build_robot_parser, can_fetch
+
+
+class FakeResponse:
+    def __init__(self, status_code, text=''):
+        self.status_code = status_code
+        self.text = text
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(web_scraper, 'time', SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+@pytest.fixture
+def robots(monkeypatch, tmp_path):
+    """Empty robots.txt caches, with robots.txt checks switched on."""
+    cache = RobotsDiskCache(path=str(tmp_path / 'robots.json'))
+    monkeypatch.setattr(web_scraper, '_robots_disk_cache', cache)
+    monkeypatch.setattr(web_scraper, '_robot_parsers', {})
+    monkeypatch.setattr(web_scraper, '_robot_failures', {})
+    monkeypatch.setattr(web_scraper, 'get_scraper_config', lambda: {'respect_robots_txt': True})
+    return cache
+
+
+@pytest.fixture
+def fetches(monkeypatch):
+    """Serve robots.txt fetches from a list of responses or exceptions, recording each URL."""
+    fetched = []
+    responses = []
+
+    def get(url, **kwargs):
+        fetched.append(url)
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    monkeypatch.setattr(web_scraper.requests, 'get', get)
+    return fetched, responses
+
+
+def test_reserve_request_slot_spaces_requests_per_domain(clock):
+    scraper = WebScraper(rate_limit=2)
+
+    delays = [scraper.reserve_request_slot('https://example.com/a') for _ in range(3)]
+    other = scraper.reserve_request_slot('https://example.org/a')
+
+    assert delays == [0, 2, 4]
+    assert other == 0
+
+    clock[0] += 10
+    assert scraper.reserve_request_slot('https://example.com/b') == 0
+    scraper.session.close()
+
+
+def test_robots_disk_cache_round_trip(tmp_path):
+    cache = RobotsDiskCache(path=str(tmp_path / 'data' / 'robots.json'))
+
+    assert cache.get('example.com') is None
+    cache.set('example.com', 200, ['User-agent: *', 'Disallow: /private'])
+    cache.set('example.org', 404, [])
+
+    entry = cache.get('example.com')
+    assert (entry['status'], entry['lines']) == (200, ['User-agent: *', 'Disallow: /private'])
+    assert cache.get('example.org')['status'] == 404
+
+
+def test_robots_disk_cache_entries_expire(tmp_path, clock):
+    cache = RobotsDiskCache(path=str(tmp_path / 'robots.json'), ttl=60)
+    cache.set('example.com', 200, [])
+
+    clock[0] += 59
+    assert cache.get('example.com') is not None
+    clock[0] += 1
+    assert cache.get('example.com') is None
+
+
+def test_robots_disk_cache_recovers_from_corrupt_file(tmp_path):
+    path = tmp_path / 'robots.json'
+    path.write_text('{not json', encoding='utf-8')
+    cache = RobotsDiskCache(path=str(path))
+
+    assert cache.get('example.com') is None
+    cache.set('example.com', 200, [])
+
+    assert list(json.loads(path.read_text(encoding='utf-8'))) == ['example.com']
+
+
+def test_robots_rules_are_read_from_disk_cache(robots, fetches):
+    robots.set('example.com', 200, ['User-agent: *', 'Disallow: /private'])
+
+    assert can_fetch('https://example.com/public') is True
+    assert can_fetch('https://example.com/private/page') is False
+    assert fetches[0] == []
+
+
+def test_fetched_robots_rules_are_persisted(robots, fetches):
+    fetched, responses = fetches
+    responses.append(FakeResponse(200, 'User-agent: *\nDisallow: /private\n'))
+
+    assert can_fetch('https://example.com/private') is False
+
+    assert robots.get('example.com')['lines'] == ['User-agent: *', 'Disallow: /private']
+
+
+def test_server_errors_are_not_persisted_or_remembered(robots, fetches, clock):
+    fetched, responses = fetches
+    responses.extend([FakeResponse(503), FakeResponse(200, 'User-agent: *\nDisallow: /\n')])
+
+    assert can_fetch('https://example.com/page') is True
+    assert robots.get('example.com') is None
+
+    # Within the retry window the failed host is not fetched again
+    assert can_fetch('https://example.com/page') is True
+    assert len(fetched) == 1
+
+    clock[0] += web_scraper._ROBOTS_RETRY_AFTER
+    assert can_fetch('https://example.com/page') is False
+    assert len(fetched) == 2
+
+
+def test_network_errors_are_retried_after_the_window(robots, fetches, clock):
+    fetched, responses = fetches
+    responses.extend([web_scraper.requests.ConnectionError('unreachable'), FakeResponse(404)])
+
+    assert can_fetch('https://example.com/page') is True
+    clock[0] += web_scraper._ROBOTS_RETRY_AFTER
+    assert can_fetch('https://example.com/page') is True
+
+    assert len(fetched) == 2
+    assert robots.get('example.com')['status'] == 404
+
+
+@pytest.mark.parametrize('status, lines, allowed', [
+    (200, ['User-agent: *', 'Disallow: /private'], {'/public': True, '/private/x': False}),
+    (403, [], {'/public': False}),
+    (404, [], {'/public': True, '/private/x': True}),
+])
+def test_build_robot_parser_matches_status_handling(status, lines, allowed):
+    rp = _build_robot_parser(status, lines)
+
+    for path, expected in allowed.items():
+        assert rp.can_fetch('*', f'https://example.com{path}') is expected
+
+
+def test_robots_txt_is_fetched_once_per_host(robots, fetches):
+    fetched, responses = fetches
+    responses.extend([FakeResponse(200, 'User-agent: *\nDisallow: /private\n'), FakeResponse(404)])
+
+    assert can_fetch('https://example.com/private') is False
+    assert can_fetch('https://example.com/other') is True
+    assert can_fetch('http://example.org/private') is True
+    assert can_fetch('http://example.org/other') is True
+
+    assert fetched == ['https://example.com/robots.txt', 'http://example.org/robots.txt']
+
+
+def test_scraper_checks_robots_with_its_user_agent(robots):
+    robots.set('example.com', 200, ['User-agent: TestBot', 'Disallow: /'])
+    scraper = WebScraper(user_agent='TestBot')
+
+    assert scraper.can_fetch('https://example.com/page') is False
+    assert can_fetch('https://example.com/page') is True
+    scraper.session.close()
+
+
+def test_can_fetch_skips_robots_when_disabled(monkeypatch):
+    monkeypatch.setattr(web_scraper, 'get_scraper_config', lambda: {'respect_robots_txt': False})
+    monkeypatch.setattr(web_scraper, '_get_robot_parser', lambda *args: pytest.fail('unexpected robots lookup'))
+
+    assert can_fetch('https://example.com/private') is True
@@ -2,10 +2,19 @@ import requests
 from bs4 import BeautifulSoup
 from urllib.robotparser import RobotFileParser
 from urllib.parse import urlparse, urljoin
+import threading
 import time
 import logging
+import json
+import os
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import re
+from system_config import get_scraper_config
+
+try:
+    import fcntl
+except ImportError:  # Windows has no flock; the cache then relies on atomic file replacement only
+    fcntl = None
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -16,31 +25,28 @@ class WebScraper:
                  rate_limit=1, timeout=10, max_retries=3):
         self.session = requests.Session()
         self.session.headers.update({"User-Agent": user_agent})
-        self.robot_parser = RobotFileParser()
         self.rate_limit = rate_limit
         self.timeout = timeout
         self.max_retries = max_retries
         self.last_request_time = {}
+        self._rate_lock = threading.Lock()
 
     def can_fetch(self, url):
-        # parsed_url = urlparse(url)
-        # robots_url = f"{parsed_url.scheme}://{parsed_url.netloc}/robots.txt"
-        # self.robot_parser.set_url(robots_url)
-        # try:
-        #     self.robot_parser.read()
-        #     return self.robot_parser.can_fetch(self.session.headers["User-Agent"], url)
-        # except Exception as e:
-        #     logger.warning(f"Error reading robots.txt for {url}: {e}")
-            return True  # ignore robots.txt
+        return can_fetch(url, self.session.headers["User-Agent"])
 
-    def respect_rate_limit(self, url):
+    def reserve_request_slot(self, url):
+        """Claim the next request slot for the URL's domain; returns the seconds to wait before sending."""
         domain = urlparse(url).netloc
-        current_time = time.time()
-        if domain in self.last_request_time:
-            time_since_last_request = current_time - self.last_request_time[domain]
-            if time_since_last_request < self.rate_limit:
-                time.sleep(self.rate_limit - time_since_last_request)
-        self.last_request_time[domain] = time.time()
+        with self._rate_lock:
+            current_time = time.time()
+            slot = max(current_time, self.last_request_time.get(domain, 0) + self.rate_limit)
+            self.last_request_time[domain] = slot
+        return slot - current_time
+
+    def respect_rate_limit(self, url):
+        delay = self.reserve_request_slot(url)
+        if delay > 0:
+            time.sleep(delay)
 
     def scrape_page(self, url):
         if not self.can_fetch(url):
@@ -98,8 +104,9 @@ class WebScraper:
             "links": links[:10]  # Limit to first 10 links
         }
 
-def scrape_multiple_pages(urls, max_workers=5):
-    scraper = WebScraper()
+def scrape_multiple_pages(urls, max_workers=5, scraper=None):
+    # Pass a long-lived scraper to share its session and per-domain rate limit across batches
+    scraper = scraper or WebScraper()
     results = {}
 
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
@@ -119,22 +126,127 @@ def scrape_multiple_pages(urls, max_workers=5):
     return results
 
 # Function to integrate with your main system
-def get_web_content(urls):
-    scraped_data = scrape_multiple_pages(urls)
+def get_web_content(urls, scraper=None):
+    scraped_data = scrape_multiple_pages(urls, scraper=scraper)
     return {url: data['content'] for url, data in scraped_data.items() if data}
 
+class RobotsDiskCache:
+    """
+    Persists fetched robots.txt files across runs so repeat hosts skip the network fetch.
+    Entries map netloc to {"fetched_at", "status", "lines"} in a JSON file.
+    """
+
+    def __init__(self, path="data/robots_cache.json", ttl=86400):
+        self.path = path
+        self.ttl = ttl
+
+    def _read(self, f):
+        f.seek(0)
+        try:
+            return json.loads(f.read() or '{}')
+        except ValueError:
+            return {}
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        return open(self.path, 'a+', encoding='utf-8')
+
+    def get(self, netloc):
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with self._open() as f:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_SH)
+                entry = self._read(f).get(netloc)
+        except OSError as e:
+            logger.warning(f"Could not read robots cache {self.path}: {e}")
+            return None
+        if entry and time.time() - entry['fetched_at'] < self.ttl:
+            return entry
+        return None
+
+    def set(self, netloc, status, lines):
+        try:
+            with self._open() as f:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                entries = self._read(f)
+                entries[netloc] = {'fetched_at': time.time(), 'status': status, 'lines': lines}
+                f.seek(0)
+                f.truncate()
+                json.dump(entries, f)
+        except OSError as e:
+            logger.warning(f"Could not write robots cache {self.path}: {e}")
+
+_robots_disk_cache = RobotsDiskCache()
+
+def _build_robot_parser(status, lines):
+    """Rebuild a RobotFileParser the same way RobotFileParser.read() interprets a response."""
+    rp = RobotFileParser()
+    if status in (401, 403):
+        rp.disallow_all = True
+    elif 400 <= status < 500:
+        rp.allow_all = True
+    rp.parse(lines)
+    return rp
+
+_ROBOTS_MAX_HOSTS = 1024
+_ROBOTS_RETRY_AFTER = 60  # Seconds before a host whose robots.txt could not be read is tried again
+_robot_parsers = {}  # (scheme, netloc) -> parsed robots.txt, oldest first
+_robot_failures = {}  # (scheme, netloc) -> when its robots.txt last failed to load
+
+def _get_robot_parser(scheme, netloc):
+    """Return the parsed robots.txt for a host, fetching it once per process; None if it can't be read."""
+    key = (scheme, netloc)
+    rp = _robot_parsers.get(key)
+    if rp is not None:
+        return rp
+    failed_at = _robot_failures.get(key)
+    if failed_at is not None and time.time() - failed_at < _ROBOTS_RETRY_AFTER:
+        return None
+
+    rp = _load_robot_parser(scheme, netloc)
+    if rp is None:
+        # Only remembered briefly: network and server errors are usually transient
+        _robot_failures[key] = time.time()
+        if len(_robot_failures) > _ROBOTS_MAX_HOSTS:
+            _robot_failures.pop(next(iter(_robot_failures)), None)
+        return None
+    _robot_failures.pop(key, None)
+    _robot_parsers[key] = rp
+    if len(_robot_parsers) > _ROBOTS_MAX_HOSTS:
+        _robot_parsers.pop(next(iter(_robot_parsers)), None)
+    return rp
+
+def _load_robot_parser(scheme, netloc):
+    """Build a host's parser from the disk cache, or fetch robots.txt and persist it."""
+    entry = _robots_disk_cache.get(netloc)
+    if entry:
+        return _build_robot_parser(entry['status'], entry['lines'])
+
+    try:
+        response = requests.get(f"{scheme}://{netloc}/robots.txt", timeout=10)
+    except requests.RequestException as e:
+        logger.warning(f"Error reading robots.txt for {netloc}: {e}")
+        return None
+    if response.status_code >= 500:
+        # Server errors are transient; don't persist them
+        logger.warning(f"Error reading robots.txt for {netloc}: HTTP {response.status_code}")
+        return None
+    lines = response.text.splitlines() if response.status_code < 400 else []
+    _robots_disk_cache.set(netloc, response.status_code, lines)
+    return _build_robot_parser(response.status_code, lines)
+
 # Standalone can_fetch function
-def can_fetch(url):
-    # parsed_url = urlparse(url)
-    # robots_url = f"{parsed_url.scheme}://{parsed_url.netloc}/robots.txt"
-    # rp = RobotFileParser()
-    # rp.set_url(robots_url)
-    # try:
-    #     rp.read()
-    #     return rp.can_fetch("*", url)
-    # except Exception as e:
-    #     logger.warning(f"Error reading robots.txt for {url}: {e}")
-        return True  # ignore robots.xt
+def can_fetch(url, user_agent="*"):
+    if not get_scraper_config()["respect_robots_txt"]:
+        return True  # ignore robots.txt
+    parsed_url = urlparse(url)
+    rp = _get_robot_parser(parsed_url.scheme, parsed_url.netloc)
+    return rp.can_fetch(user_agent, url) if rp is not None else True
 
 if __name__ == "__main__":
     test_urls = [